@@ -0,0 +1,77 @@
+"""
+Measures matching plugin names against a large blacklist.
+
+Usage: python benchmarks/blacklist.py [ENTRIES]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from esp2dsd.blacklist import Blacklist  # noqa: E402
+
+FILES = 20_000
+"""
+Number of plugin names to match, about the plugins of 2-3k mods.
+"""
+
+
+def make_blacklist(entries: int) -> list[str]:
+    lines = ["# Generated blacklist"]
+
+    for i in range(entries):
+        match i % 100:
+            case 0:
+                lines.append(f"@{100000 + i}")
+            case 1:
+                lines.append(f"Mod {i}/")
+            case 2 if i < 1000:
+                lines.append(f"*_Patch{i}.esp")
+            case 3 if i < 1000:
+                lines.append(rf"re:Plugin{i}_(RU|UA)\.es[pm]")
+            case _:
+                lines.append(f"Plugin{i}.esp")
+
+    return lines
+
+
+def match_list(lines: list[str], files: list[str]) -> int:
+    """
+    Matches like the blacklist list that was used before `Blacklist`.
+    """
+
+    blacklist_files = [
+        line.lower()
+        for line in lines
+        if line and not line.startswith(("#", "@")) and not line.endswith("/")
+    ]
+
+    return sum(file.lower() in map(str.lower, blacklist_files) for file in files)
+
+
+def match_blacklist(lines: list[str], files: list[str]) -> int:
+    blacklist = Blacklist(lines)
+
+    return sum(blacklist.is_file_blacklisted(file) for file in files)
+
+
+def main(entries: int):
+    random.seed(0)
+    lines = make_blacklist(entries)
+    files = [f"Plugin{random.randrange(entries * 2)}.esp" for _ in range(FILES)]
+
+    print(f"{entries} entries, {FILES} plugins")
+
+    for name, function in [("list", match_list), ("Blacklist", match_blacklist)]:
+        start = time.perf_counter()
+        matches = function(lines, files)
+        elapsed = time.perf_counter() - start
+
+        print(f"  {name:<12}{elapsed * 1000:10.1f} ms {matches:>8} matches")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
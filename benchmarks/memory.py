@@ -0,0 +1,77 @@
+"""
+Measures the memory used by parsed plugins and their extracted strings.
+
+Usage: python benchmarks/memory.py PLUGIN [PLUGIN ...]
+
+Memory mapped file data is not counted since it is backed by the file.
+"""
+
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from esp2dsd.plugin_interface import Plugin  # noqa: E402
+
+
+def measure(function: Callable[[], object]) -> tuple[int, int]:
+    """
+    Returns the memory held by the result of `function` and the peak memory
+    while calling it in bytes.
+    """
+
+    gc.collect()
+    tracemalloc.start()
+
+    result = function()
+    current, peak = tracemalloc.get_traced_memory()
+
+    tracemalloc.stop()
+    del result
+
+    return current, peak
+
+
+def load_plugin(path: Path, **options) -> Plugin:
+    plugin = Plugin(path, **options)
+
+    # Parse all records
+    plugin.extract_strings(unfiltered=True)
+
+    return plugin
+
+
+def format_size(size: int) -> str:
+    return f"{size / 1024 / 1024:8.1f} MB"
+
+
+def main(paths: list[Path]):
+    modes: dict[str, dict[str, bool]] = {
+        "default": {},
+        "discard_data": {"discard_data": True},
+        "use_mmap": {"use_mmap": True},
+        "use_mmap, discard_data": {"use_mmap": True, "discard_data": True},
+    }
+
+    for path in paths:
+        print(f"{path.name} ({format_size(path.stat().st_size).strip()})")
+
+        for name, options in modes.items():
+            current, peak = measure(lambda: load_plugin(path, **options))
+            print(f"  {name:<24}{format_size(current)} held {format_size(peak)} peak")
+
+        current, peak = measure(
+            lambda: Plugin(path, use_mmap=True).extract_strings(unfiltered=True)
+        )
+        print(f"  {'extracted strings':<24}{format_size(current)} held")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__.strip())
+        sys.exit(1)
+
+    main([Path(arg) for arg in sys.argv[1:]])
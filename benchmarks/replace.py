@@ -0,0 +1,106 @@
+"""
+Measures applying translated strings to a plugin with `Plugin.replace_strings`.
+
+Usage: python benchmarks/replace.py [STRINGS] [--sample N]
+
+The linear search that was used before the string index is only measured
+for `--sample` strings and extrapolated to all strings.
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from esp2dsd.plugin_interface import Plugin  # noqa: E402
+from esp2dsd.plugin_interface.plugin_string import PluginString  # noqa: E402
+from esp2dsd.plugin_interface.subrecord import StringSubrecord  # noqa: E402
+
+from synthetic import generate_pair  # noqa: E402
+
+STRINGS_PER_SCALE = 12
+"""
+Approximate number of strings per `scale` in a plugin with the default record mix.
+"""
+
+
+def make_strings(plugin: Plugin, count: int) -> list[PluginString]:
+    strings = plugin.extract_strings()[:count]
+
+    for string in strings:
+        string.translated_string = string.original_string.upper()
+
+    return strings
+
+
+def find_linear(
+    string_subrecords: dict[PluginString, StringSubrecord], string: PluginString
+) -> StringSubrecord | None:
+    """
+    Searches like `Plugin.find_string_subrecord` did before the string index.
+    """
+
+    for plugin_string, subrecord in string_subrecords.items():
+        if (
+            plugin_string.form_id[2:] == string.form_id[2:]
+            and plugin_string.type == string.type
+            and plugin_string.original_string == string.original_string
+            and plugin_string.index == string.index
+        ):
+            return subrecord
+
+
+def measure_linear(plugin: Plugin, strings: list[PluginString], sample: int) -> float:
+    """
+    Returns the extrapolated time of the linear search for all `strings`.
+    """
+
+    string_subrecords: dict[PluginString, StringSubrecord] = {}
+    for group in plugin.groups:
+        string_subrecords |= plugin.extract_group_strings(group)
+
+    # Spread the sample over the plugin since the search stops at the first match
+    step = max(len(strings) // sample, 1)
+    sampled = strings[::step][:sample]
+
+    start = time.perf_counter()
+    for string in sampled:
+        find_linear(string_subrecords, string)
+    elapsed = time.perf_counter() - start
+
+    return elapsed / len(sampled) * len(strings)
+
+
+def measure_indexed(plugin: Plugin, strings: list[PluginString]) -> float:
+    start = time.perf_counter()
+    plugin.replace_strings(strings)
+
+    return time.perf_counter() - start
+
+
+def main(args: list[str]):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("strings", type=int, nargs="?", default=100_000)
+    parser.add_argument("--sample", type=int, default=200)
+    options = parser.parse_args(args)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        scale = options.strings // STRINGS_PER_SCALE + 1
+        original, _ = generate_pair(Path(temp_dir), scale)
+
+        plugin = Plugin(original)
+        strings = make_strings(plugin, options.strings)
+        print(f"{len(strings)} strings, {original.stat().st_size / 1024 / 1024:.1f} MB")
+
+        linear = measure_linear(plugin, strings, options.sample)
+        indexed = measure_indexed(Plugin(original), strings)
+
+    print(f"  {'linear':<12}{linear * 1000:12.1f} ms (extrapolated)")
+    print(f"  {'indexed':<12}{indexed * 1000:12.1f} ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
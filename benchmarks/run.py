@@ -0,0 +1,191 @@
+"""
+Measures time and peak memory of parsing, extracting, merging and dumping plugins.
+
+Usage: python benchmarks/run.py [--scale N] [--mix TYPE=WEIGHT,...] [--localized]
+                                [--plugins ORIGINAL TRANSLATION] [--repeat N]
+                                [--save RESULTS.json] [--compare BASELINE.json]
+
+Without `--plugins`, a synthetic plugin pair is generated with `synthetic.py`.
+With `--compare`, stages that are slower or use more memory than the baseline
+by more than `--threshold` are reported and the exit code is 1.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from esp2dsd.converter import extract_strings, merge_plugin_strings  # noqa: E402
+from esp2dsd.plugin_interface import Plugin  # noqa: E402
+from esp2dsd.plugin_interface.group import Group  # noqa: E402
+
+from synthetic import RecordMix, generate_pair  # noqa: E402
+
+
+def parse_group(group: Group):
+    for child in group.children:
+        if isinstance(child, Group):
+            parse_group(child)
+        else:
+            child.subrecords
+
+
+def parse_plugin(path: Path) -> Plugin:
+    """
+    Loads a plugin and parses the subrecords of all records.
+    """
+
+    plugin = Plugin(path)
+
+    for group in plugin.groups:
+        parse_group(group)
+
+    return plugin
+
+
+def measure_time(function: Callable[[], object], repeat: int) -> float:
+    """
+    Returns the best time of `repeat` calls in seconds.
+    """
+
+    times: list[float] = []
+
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def measure_memory(function: Callable[[], object]) -> int:
+    """
+    Returns the peak memory allocated while calling `function` in bytes.
+    """
+
+    gc.collect()
+    tracemalloc.start()
+
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(original: Path, translation: Path, repeat: int) -> dict[str, dict]:
+    parsed_plugin = parse_plugin(original)
+
+    stages: dict[str, Callable[[], object]] = {
+        "parse": lambda: parse_plugin(original),
+        "extract": lambda: extract_strings(original),
+        "merge": lambda: merge_plugin_strings(translation, original),
+        "dump": parsed_plugin.dump,
+    }
+
+    results: dict[str, dict] = {}
+
+    for name, function in stages.items():
+        results[name] = {
+            "time": measure_time(function, repeat),
+            "peak_memory": measure_memory(function),
+        }
+
+        print(
+            f"  {name:<10}{results[name]['time'] * 1000:10.1f} ms"
+            f"{results[name]['peak_memory'] / 1024 / 1024:10.1f} MB peak"
+        )
+
+    return results
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> bool:
+    """
+    Prints the ratios of `results` to `baseline` and returns False
+    if any stage regressed by more than `threshold`.
+    """
+
+    passed = True
+
+    print(f"Compared to baseline (threshold {threshold:.0%}):")
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        line = f"  {name:<10}"
+        regressions: list[str] = []
+
+        for key, label in [("time", "time"), ("peak_memory", "memory")]:
+            ratio = result[key] / baseline[name][key] if baseline[name][key] else 1.0
+            line += f"{label} {ratio:6.2f}x  "
+
+            if ratio > 1 + threshold:
+                regressions.append(label)
+
+        if regressions:
+            line += "REGRESSION (" + ", ".join(regressions) + ")"
+            passed = False
+
+        print(line)
+
+    return passed
+
+
+def main(args: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1000)
+    parser.add_argument("--mix", type=RecordMix.parse, default=RecordMix())
+    parser.add_argument("--localized", action="store_true")
+    parser.add_argument(
+        "--plugins", nargs=2, type=Path, metavar=("ORIGINAL", "TRANSLATION")
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", type=Path)
+    parser.add_argument("--compare", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.1)
+    options = parser.parse_args(args)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if options.plugins:
+            original, translation = options.plugins
+        else:
+            original, translation = generate_pair(
+                Path(temp_dir), options.scale, options.mix, localized=options.localized
+            )
+
+        size = original.stat().st_size
+        print(f"{original.name} ({size / 1024 / 1024:.1f} MB), best of {options.repeat}")
+
+        results = run(original, translation, options.repeat)
+
+    if options.save:
+        report = {
+            "python": platform.python_version(),
+            "plugin": original.name,
+            "plugin_size": size,
+            "stages": results,
+        }
+        options.save.write_text(json.dumps(report, indent=4), encoding="utf-8")
+
+    if options.compare:
+        baseline = json.loads(options.compare.read_text(encoding="utf-8"))
+        if baseline.get("plugin_size") != size:
+            print("Warning: The baseline was measured with a plugin of another size.")
+        if not compare(results, baseline["stages"], options.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
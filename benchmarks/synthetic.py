@@ -0,0 +1,447 @@
+"""
+Generates synthetic plugins and translated variants of them for benchmarks.
+
+Usage: python benchmarks/synthetic.py OUTPUT_DIR [--scale N] [--mix TYPE=WEIGHT,...]
+                                      [--localized] [--light] [--seed N]
+
+Writes `OUTPUT_DIR/original/Synthetic.esm` and `OUTPUT_DIR/translation/Synthetic.esm`
+(plus `Strings/` tables if `--localized` is given).
+"""
+
+import argparse
+import random
+import struct
+import sys
+import zlib
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+RECORD_HEADER = struct.Struct("<4sIIIHHHH")
+GROUP_HEADER = struct.Struct("<4sI4siHHI")
+SUBRECORD_HEADER = struct.Struct("<4sH")
+
+MASTER = 0x1
+LOCALIZED = 0x80
+LIGHT = 0x200
+COMPRESSED = 0x40000
+
+WORDS = (
+    "iron sword dragon shield ancient nord tomb whiterun jarl guard bandit "
+    "steel arrow amulet mara dibella potion health stamina magicka frost "
+    "fire shock skeever draugr cave mountain river tavern mead honey"
+).split()
+
+STRING_TABLES = ("STRINGS", "DLSTRINGS", "ILSTRINGS")
+
+
+@dataclass
+class RecordMix:
+    """
+    Number of records of each kind per 100 `scale`.
+    """
+
+    weap: float = 100
+    book: float = 20
+    npc: float = 100
+    """
+    Compressed NPC_ records.
+    """
+
+    mesg: float = 20
+    perk: float = 20
+    qust: float = 20
+    dial: float = 20
+    """
+    Topics with 5 INFO records each.
+    """
+
+    cell: float = 20
+    """
+    Interior cells in blocks and sub-blocks with persistent and temporary references.
+    """
+
+    wrld: float = 1
+    """
+    Worldspaces with 10 exterior cells each.
+    """
+
+    @classmethod
+    def parse(cls, text: str) -> "RecordMix":
+        """
+        Parses a mix like "qust=100,npc=0". Kinds that are not given keep their default.
+        """
+
+        mix = cls()
+        names = {field.name for field in fields(cls)}
+
+        for item in filter(None, text.split(",")):
+            name, _, weight = item.partition("=")
+            name = name.strip().lower()
+
+            if name not in names:
+                raise ValueError(f"Unknown record kind {name!r}!")
+
+            setattr(mix, name, float(weight))
+
+        return mix
+
+    def get_count(self, name: str, scale: int) -> int:
+        return round(getattr(self, name) * scale / 100)
+
+
+class Generator:
+    """
+    Builds the records of one plugin. Generators with the same seed build
+    the same records, translated if `translate` is True.
+    """
+
+    def __init__(self, seed: int = 0, translate: bool = False, localized: bool = False):
+        self.rng = random.Random(seed)
+        self.translation_rng = random.Random(seed + 1)
+        self.translate = translate
+        self.localized = localized
+        self.next_formid = 0x01000800
+        self.next_string_id = 1
+        self.string_tables: dict[str, dict[int, str]] = {
+            table: {} for table in STRING_TABLES
+        }
+
+    def formid(self) -> int:
+        self.next_formid += 1
+        return self.next_formid
+
+    def text(self, words: int) -> str:
+        return " ".join(self.rng.choice(WORDS) for _ in range(words)).capitalize()
+
+    def translated(self, text: str) -> str:
+        # Some strings stay untranslated like in real translations
+        if not self.translate or self.translation_rng.random() < 0.1:
+            return text
+
+        return "Перевод: " + text[::-1]
+
+    def subrecord(self, type: str, data: bytes) -> bytes:
+        return SUBRECORD_HEADER.pack(type.encode(), len(data)) + data
+
+    def string(self, type: str, text: str, table: str = "STRINGS") -> bytes:
+        text = self.translated(text)
+
+        if self.localized:
+            string_id = self.next_string_id
+            self.next_string_id += 1
+            self.string_tables[table][string_id] = text
+
+            return self.subrecord(type, struct.pack("<I", string_id))
+
+        return self.subrecord(type, text.encode("utf8") + b"\x00")
+
+    def edid(self, text: str) -> bytes:
+        return self.subrecord("EDID", text.encode() + b"\x00")
+
+    def record(self, type: str, formid: int, data: bytes, flags: int = 0) -> bytes:
+        if flags & COMPRESSED:
+            data = struct.pack("<I", len(data)) + zlib.compress(data)
+
+        header = RECORD_HEADER.pack(type.encode(), len(data), flags, formid, 0, 0, 44, 0)
+
+        return header + data
+
+    def group(self, label: bytes, group_type: int, children: list[bytes]) -> bytes:
+        data = b"".join(children)
+        header = GROUP_HEADER.pack(b"GRUP", len(data) + 24, label, group_type, 0, 0, 0)
+
+        return header + data
+
+    def top_group(self, type: str, children: list[bytes]) -> bytes:
+        return self.group(type.encode(), 0, children)
+
+    def weap(self, i: int) -> bytes:
+        data = self.edid(f"WeapSynthetic{i}")
+        data += self.string("FULL", self.text(3))
+        data += self.string("DESC", self.text(12), "DLSTRINGS")
+        data += self.subrecord("DATA", bytes(10))
+
+        # Some records override records of the master
+        formid = 0x00012E00 + i if i % 4 == 0 else self.formid()
+
+        return self.record("WEAP", formid, data)
+
+    def book(self, i: int) -> bytes:
+        data = self.edid(f"BookSynthetic{i}")
+        data += self.string("FULL", self.text(4))
+        data += self.string("DESC", self.text(self.rng.randint(50, 2000)), "DLSTRINGS")
+        data += self.string("CNAM", self.text(6), "DLSTRINGS")
+
+        return self.record("BOOK", self.formid(), data)
+
+    def npc(self, i: int) -> bytes:
+        data = self.edid(f"NpcSynthetic{i}")
+        data += self.subrecord("ACBS", bytes(self.rng.randrange(256) for _ in range(24)))
+        data += self.string("FULL", self.text(2))
+        data += self.string("SHRT", self.text(1))
+        data += self.subrecord("DATA", bytes(400))
+
+        return self.record("NPC_", self.formid(), data, COMPRESSED)
+
+    def mesg(self, i: int) -> bytes:
+        data = self.edid(f"MesgSynthetic{i}")
+        data += self.string("DESC", self.text(20), "DLSTRINGS")
+        data += self.string("FULL", self.text(2))
+        for _ in range(3):
+            data += self.string("ITXT", self.text(1))
+
+        return self.record("MESG", self.formid(), data)
+
+    def perk(self, i: int) -> bytes:
+        data = self.edid(f"PerkSynthetic{i}")
+        data += self.string("FULL", self.text(2))
+        data += self.string("DESC", self.text(10), "DLSTRINGS")
+        for entry in range(3):
+            data += self.subrecord("PRKE", bytes(3))
+            data += self.subrecord("EPFT", bytes([7]))
+            data += self.string("EPFD", self.text(2))
+            data += self.subrecord("PRKE", bytes(3))
+            data += self.subrecord("EPFT", bytes([4]))
+            data += self.string("EPF2", self.text(2))
+            data += self.subrecord("EPF3", struct.pack("<HH", 0, entry + 1))
+
+        return self.record("PERK", self.formid(), data)
+
+    def qust(self, i: int) -> bytes:
+        data = self.edid(f"QustSynthetic{i}")
+        data += self.string("FULL", self.text(3))
+        for stage in range(4):
+            data += self.subrecord("INDX", struct.pack("<HBB", stage * 10, 0, 0))
+            for _ in range(2):
+                condition = bytes(self.rng.randrange(256) for _ in range(32))
+                data += self.subrecord("CTDA", condition)
+            data += self.string("CNAM", self.text(15), "DLSTRINGS")
+        for objective in range(3):
+            data += self.subrecord("QOBJ", struct.pack("<h", objective * 10))
+            data += self.string("NNAM", self.text(5))
+
+        return self.record("QUST", self.formid(), data)
+
+    def info(self, i: int) -> bytes:
+        data = self.edid(f"InfoSynthetic{i}") if i % 3 == 0 else b""
+        for response in range(1, 3):
+            response_data = struct.pack(
+                "<IIiB3sIB3s", 0, 50, 0, response, bytes(3), 0, 0, bytes(3)
+            )
+            data += self.subrecord("TRDT", response_data)
+            data += self.string("NAM1", self.text(10), "ILSTRINGS")
+        data += self.string("RNAM", self.text(3))
+
+        return self.record("INFO", self.formid(), data)
+
+    def dial(self, i: int, infos: int = 5) -> list[bytes]:
+        formid = self.formid()
+        data = self.edid(f"DialSynthetic{i}") + self.string("FULL", self.text(3))
+        children = [self.info(i * 100 + n) for n in range(infos)]
+
+        return [
+            self.record("DIAL", formid, data),
+            self.group(struct.pack("<I", formid), 7, children),
+        ]
+
+    def refr(self, i: int, named: bool) -> bytes:
+        data = self.edid(f"RefrSynthetic{i}") if named else b""
+        data += self.subrecord("NAME", struct.pack("<I", 0x1000))
+        if named:
+            data += self.string("FULL", self.text(2))
+        data += self.subrecord("DATA", bytes(24))
+
+        return self.record("REFR", self.formid(), data)
+
+    def land(self) -> bytes:
+        heights = bytes(self.rng.randrange(8) for _ in range(1096))
+        data = self.subrecord("DATA", bytes(4)) + self.subrecord("VHGT", heights)
+
+        return self.record("LAND", self.formid(), data, COMPRESSED)
+
+    def cell(self, i: int, refs: int = 4) -> list[bytes]:
+        formid = self.formid()
+        data = self.edid(f"CellSynthetic{i}") + self.string("FULL", self.text(2))
+        data += self.subrecord("DATA", bytes(2))
+
+        label = struct.pack("<I", formid)
+        persistent = [self.refr(i * 100 + n, n % 2 == 0) for n in range(refs)]
+        temporary = [self.land()] + [self.refr(i * 1000 + n, False) for n in range(refs)]
+        children = self.group(
+            label,
+            6,
+            [self.group(label, 8, persistent), self.group(label, 9, temporary)],
+        )
+
+        return [self.record("CELL", formid, data), children]
+
+    def interior_cells(self, count: int) -> bytes:
+        blocks = []
+
+        for block in range((count + 9) // 10):
+            subblocks = []
+            for subblock in range(2):
+                cells = []
+                for n in range(5):
+                    cells += self.cell(block * 10 + subblock * 5 + n)
+                subblocks.append(self.group(struct.pack("<i", subblock), 3, cells))
+            blocks.append(self.group(struct.pack("<i", block), 2, subblocks))
+
+        return self.top_group("CELL", blocks)
+
+    def worldspaces(self, count: int) -> bytes:
+        children = []
+
+        for w in range(count):
+            formid = self.formid()
+            data = self.edid(f"WrldSynthetic{w}") + self.string("FULL", self.text(2))
+
+            blocks = []
+            for y in range(2):
+                cells = []
+                for x in range(5):
+                    cells += self.cell(w * 100 + y * 10 + x)
+                subblock = self.group(struct.pack("<hh", y, -y), 5, cells)
+                blocks.append(self.group(struct.pack("<hh", y, -1), 4, [subblock]))
+
+            children.append(self.record("WRLD", formid, data))
+            children.append(self.group(struct.pack("<I", formid), 1, blocks))
+
+        return self.top_group("WRLD", children)
+
+    def header(self, flags: int, masters: list[str]) -> bytes:
+        data = self.subrecord("HEDR", struct.pack("<fII", 1.71, 100, self.next_formid))
+        data += self.subrecord("CNAM", b"Synthetic\x00")
+        for master in masters:
+            data += self.subrecord("MAST", master.encode() + b"\x00")
+            data += self.subrecord("DATA", bytes(8))
+
+        return self.record("TES4", 0, data, flags)
+
+
+def generate(
+    scale: int = 100,
+    mix: RecordMix | None = None,
+    seed: int = 0,
+    translate: bool = False,
+    localized: bool = False,
+    light: bool = False,
+    masters: tuple[str, ...] = ("Skyrim.esm",),
+) -> tuple[bytes, dict[str, dict[int, str]]]:
+    """
+    Returns the data of a plugin and its string tables, which are empty
+    unless `localized` is True.
+    """
+
+    mix = mix or RecordMix()
+    generator = Generator(seed, translate, localized)
+
+    def count(name: str) -> int:
+        return mix.get_count(name, scale)
+
+    groups = [
+        generator.top_group("WEAP", [generator.weap(i) for i in range(count("weap"))]),
+        generator.top_group("BOOK", [generator.book(i) for i in range(count("book"))]),
+        generator.top_group("NPC_", [generator.npc(i) for i in range(count("npc"))]),
+        generator.top_group("MESG", [generator.mesg(i) for i in range(count("mesg"))]),
+        generator.top_group("PERK", [generator.perk(i) for i in range(count("perk"))]),
+        generator.top_group("QUST", [generator.qust(i) for i in range(count("qust"))]),
+        generator.top_group(
+            "DIAL", [data for i in range(count("dial")) for data in generator.dial(i)]
+        ),
+        generator.interior_cells(count("cell")),
+        generator.worldspaces(count("wrld")),
+    ]
+
+    flags = MASTER | (LOCALIZED if localized else 0) | (LIGHT if light else 0)
+    header = generator.header(flags, list(masters))
+
+    return header + b"".join(groups), generator.string_tables
+
+
+def dump_string_table(strings: dict[int, str], table: str, encoding: str = "utf8") -> bytes:
+    """
+    Returns a string table file. Strings in DLSTRINGS and ILSTRINGS tables
+    are prefixed with their length.
+    """
+
+    directory = b""
+    data = b""
+
+    for string_id, text in strings.items():
+        directory += struct.pack("<II", string_id, len(data))
+        encoded = text.encode(encoding) + b"\x00"
+
+        if table != "STRINGS":
+            encoded = struct.pack("<I", len(encoded)) + encoded
+
+        data += encoded
+
+    return struct.pack("<II", len(strings), len(data)) + directory + data
+
+
+def write_plugin(
+    path: Path,
+    data: bytes,
+    string_tables: dict[str, dict[int, str]],
+    language: str = "english",
+):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+
+    if any(string_tables.values()):
+        strings_dir = path.parent / "Strings"
+        strings_dir.mkdir(exist_ok=True)
+
+        for table, strings in string_tables.items():
+            table_path = strings_dir / f"{path.stem}_{language}.{table}"
+            table_path.write_bytes(dump_string_table(strings, table))
+
+
+def generate_pair(
+    output_dir: Path,
+    scale: int = 100,
+    mix: RecordMix | None = None,
+    seed: int = 0,
+    localized: bool = False,
+    light: bool = False,
+    name: str = "Synthetic.esm",
+) -> tuple[Path, Path]:
+    """
+    Writes an original plugin and its translation and returns their paths.
+    """
+
+    paths = (output_dir / "original" / name, output_dir / "translation" / name)
+
+    for path, translate in zip(paths, (False, True)):
+        data, string_tables = generate(
+            scale, mix, seed, translate=translate, localized=localized, light=light
+        )
+        write_plugin(path, data, string_tables)
+
+    return paths
+
+
+def main(args: list[str]):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output_dir", type=Path)
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--mix", type=RecordMix.parse, default=RecordMix())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--localized", action="store_true")
+    parser.add_argument("--light", action="store_true")
+    options = parser.parse_args(args)
+
+    for path in generate_pair(
+        options.output_dir,
+        options.scale,
+        options.mix,
+        options.seed,
+        options.localized,
+        options.light,
+    ):
+        print(f"{path} ({path.stat().st_size / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,63 @@
+"""
+Measures the decoding of null-terminated strings like BOOK DESC texts.
+
+Usage: python benchmarks/zstring.py
+"""
+
+import sys
+import timeit
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from esp2dsd.plugin_interface.datatypes import RawString  # noqa: E402
+
+SIZES = [1, 4, 16, 64]
+"""
+Text sizes in KB.
+"""
+
+
+def make_text(size: int) -> bytes:
+    words = [b"dragon", b"scroll", b"Whiterun", b"the", b"of", b"ancient", b"<p>"]
+    text = b""
+
+    i = 0
+    while len(text) < size:
+        text += words[i % len(words)] + b" "
+        i += 1
+
+    return text[:size] + b"\x00"
+
+
+def measure(function, number: int) -> float:
+    """
+    Returns the best time of one call in microseconds.
+    """
+
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    print(f"{'size':>6} {'bytes':>12} {'memoryview':>12} {'stream':>12}")
+
+    for size in SIZES:
+        data = make_text(size * 1024)
+        view = memoryview(data)
+        number = max(10, 2000 // size)
+
+        results = [
+            measure(lambda: RawString.parse(data, RawString.StrType.ZString), number),
+            measure(lambda: RawString.parse(view, RawString.StrType.ZString), number),
+            measure(
+                lambda: RawString.parse(BytesIO(data), RawString.StrType.ZString),
+                number,
+            ),
+        ]
+
+        print(f"{size:>4} KB" + "".join(f"{result:>10.1f}us" for result in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Generates DSD configs from translation patches without Mod Organizer 2.
+
+Usage: python -m esp2dsd MODS_DIR --modlist MODLIST_TXT --output OUTPUT_DIR [options]
+       python -m esp2dsd --pair TRANSLATION ORIGINAL [--pair ...] --output OUTPUT_DIR
+
+Translation pairs are discovered in the active mods of the load order with the
+same rules as the Mod Organizer 2 plugin, including its blacklist, scan index,
+string cache and record of incorrect pairs, which are kept next to the plugin
+unless `--state-dir` is given. Explicit pairs are converted as given.
+
+Prints one line per translation pair and exits with 1 if any pair failed.
+"""
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+
+from .batch import BatchConverter, ConversionJob
+from .blacklist import Blacklist
+from .generation import (
+    TranslationFile,
+    convert_translation_files,
+    find_translation_files,
+)
+from .incorrect_pairs import IncorrectPairs
+from .instrumentation import RunReport, measure
+from .load_order import LoadOrder
+from .plugin_interface.record import IndexScheme, Record
+from .scan_index import ModScanIndex
+from .string_cache import StringCache
+
+PLUGIN_DIR = Path(__file__).resolve().parent.parent
+"""
+Directory of the Mod Organizer 2 plugin that contains the blacklist and the caches.
+"""
+
+log = logging.getLogger("esp2dsd")
+
+
+def parse_args(args: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m esp2dsd", description=__doc__.strip().splitlines()[0]
+    )
+    parser.add_argument("mods_dir", type=Path, nargs="?", help="MO2 mods directory")
+    parser.add_argument(
+        "--modlist", type=Path, help="modlist.txt of the MO2 profile with the load order"
+    )
+    parser.add_argument(
+        "--pair",
+        nargs=2,
+        type=Path,
+        action="append",
+        default=[],
+        metavar=("TRANSLATION", "ORIGINAL"),
+        help="convert a translation pair, can be repeated",
+    )
+    parser.add_argument(
+        "-o", "--output", type=Path, required=True, help="output mod directory"
+    )
+    parser.add_argument(
+        "--blacklist",
+        type=Path,
+        default=PLUGIN_DIR / "blacklist.txt",
+        help="blacklist file (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--state-dir",
+        type=Path,
+        default=PLUGIN_DIR,
+        help="directory of the scan index, string cache and incorrect pairs "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=0,
+        help="number of parallel conversions, 0 = one per CPU core (default)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=256,
+        help="maximum size of the string cache in MB, 0 = disabled (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--cache-use-hash",
+        action="store_true",
+        help="identify cached plugins by file hash instead of modification time",
+    )
+    parser.add_argument(
+        "--compact", action="store_true", help="write configs without indentation"
+    )
+    parser.add_argument(
+        "--copy-to-patch-dir",
+        action="store_true",
+        help="copy configs into the translation mods and hide the translation plugins",
+    )
+    parser.add_argument(
+        "--legacy-string-indices",
+        action="store_true",
+        help="derive quest string indices like previous versions",
+    )
+    parser.add_argument(
+        "--report",
+        action="store_true",
+        help=f"write timings to {RunReport.FILE_NAME} in the output mod",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+
+    options = parser.parse_args(args)
+
+    if options.mods_dir is None and not options.pair:
+        parser.error("either MODS_DIR with --modlist or --pair is required")
+    if options.mods_dir is not None and options.modlist is None:
+        parser.error("--modlist is required with MODS_DIR")
+    if options.mods_dir is not None and not options.mods_dir.is_dir():
+        parser.error(f"mods directory {str(options.mods_dir)!r} does not exist")
+    if options.modlist is not None and not options.modlist.is_file():
+        parser.error(f"load order file {str(options.modlist)!r} does not exist")
+
+    for translation, original in options.pair:
+        for path in (translation, original):
+            if not path.is_file():
+                parser.error(f"plugin {str(path)!r} does not exist")
+
+    return options
+
+
+def read_blacklist(path: Path) -> Blacklist:
+    try:
+        with path.open(encoding="utf-8") as file:
+            return Blacklist(file)
+    except FileNotFoundError:
+        return Blacklist()
+
+
+def get_explicit_pairs(pairs: list[tuple[Path, Path]]) -> dict[str, TranslationFile]:
+    """
+    Returns the translation pairs given on the command line, later pairs
+    of the same plugin override earlier ones.
+    """
+
+    return {
+        translation.name: TranslationFile(
+            str(translation.resolve()),
+            str(original.resolve()),
+            translation.resolve().parent.name,
+            priority,
+        )
+        for priority, (translation, original) in enumerate(pairs)
+    }
+
+
+def main(args: list[str]) -> int:
+    options = parse_args(args)
+
+    logging.basicConfig(
+        level=logging.INFO if options.verbose else logging.WARNING,
+        format="%(levelname)s %(name)s: %(message)s",
+    )
+
+    Record.index_scheme = (
+        IndexScheme.Hash if options.legacy_string_indices else IndexScheme.Blake2
+    )
+    report = RunReport() if options.report else None
+    incorrect_pairs = IncorrectPairs(options.state_dir / "incorrect_pairs.json")
+    translation_files: dict[str, TranslationFile] = {}
+
+    if options.mods_dir is not None:
+        with measure(report, "scan"):
+            load_order = LoadOrder.from_modlist(options.modlist, options.mods_dir)
+            scan_index = ModScanIndex(options.state_dir / "scan_index.json")
+            scan_index.load()
+
+            try:
+                translation_files = find_translation_files(
+                    load_order,
+                    scan_index,
+                    read_blacklist(options.blacklist),
+                    incorrect_pairs,
+                    report,
+                )
+            finally:
+                try:
+                    scan_index.save()
+                except OSError as ex:
+                    log.warning(f"Failed to save scan index: {ex}")
+
+        print(
+            f"Found {len(translation_files)} translation pair(s) "
+            f"in {len(load_order.active_mods)} active mod(s)."
+        )
+
+    translation_files |= get_explicit_pairs(options.pair)
+
+    if not translation_files:
+        print("No translation patches found.")
+        return 0
+
+    string_cache = None
+    if options.cache_size > 0:
+        string_cache = StringCache(
+            options.state_dir / "string_cache",
+            options.cache_size * 1024 * 1024,
+            options.cache_use_hash,
+        )
+
+    total = len(translation_files)
+    converted = 0
+
+    def on_converted(job: ConversionJob, result: bool | Exception | None):
+        nonlocal converted
+        converted += 1
+
+        if result is None:
+            status = "up to date"
+        elif isinstance(result, Exception):
+            status = f"failed: {result}"
+        elif result:
+            status = "generated"
+        else:
+            status = "empty"
+
+        plugin_name = os.path.basename(job.translation_plugin)
+        print(f"[{converted}/{total}] {plugin_name}: {status}", flush=True)
+
+    output_mod_path = str(options.output.resolve())
+    converter = BatchConverter(options.workers, None, string_cache, report)
+
+    try:
+        result = convert_translation_files(
+            translation_files,
+            output_mod_path,
+            converter,
+            on_converted,
+            incorrect_pairs,
+            options.copy_to_patch_dir,
+            options.compact,
+            report,
+        )
+    except KeyboardInterrupt:
+        print("Canceled.")
+        return 130
+    finally:
+        if report is not None and os.path.isdir(output_mod_path):
+            report.save(Path(output_mod_path))
+
+    print(
+        f"{result.output_files_count} DSD config(s) in {output_mod_path}, "
+        f"{len(result.empty)} empty, {len(result.errors)} failed."
+    )
+
+    for file, error in result.errors.items():
+        print(f"Error processing {file}: {error}", file=sys.stderr)
+
+    return 1 if result.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,470 @@
+"""
+Batch conversion of plugin translations to DSD config files.
+"""
+
+import importlib
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from multiprocessing.queues import Queue
+from pathlib import Path
+from typing import Callable, Iterator
+
+from .converter import StringMemo, esp2dsd_to_file
+from .instrumentation import RunReport, Timings, measure
+from .plugin_interface.record import IndexScheme, Record
+from .string_cache import StringCache
+
+
+@dataclass
+class ConversionJob:
+    """
+    Class for a single translation pair to convert.
+    """
+
+    translation_plugin: str
+    original_plugin: str
+    output_file: str
+    compact: bool = False
+    """
+    Whether the config is written without indentation.
+    """
+
+
+def convert_pair(
+    translation_plugin: str,
+    original_plugin: str,
+    output_file: str,
+    progress_callback: Callable[[Path, int, int], None] | None = None,
+    string_cache: StringCache | None = None,
+    string_memo: StringMemo | None = None,
+    compact: bool = False,
+    timings: Timings | None = None,
+) -> bool:
+    """
+    Converts a translation pair and writes the DSD config to `output_file`.
+
+    Returns False without writing anything if the config would be empty.
+    The phases of the conversion are recorded in `timings` if given.
+    """
+
+    output_dir = os.path.dirname(output_file)
+    created_dir = not os.path.isdir(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Strings are written while they are merged, to a temporary file first
+    # so that no half-written or empty config remains
+    temp_file = output_file + ".tmp"
+    count = 0
+    opened = False
+    try:
+        with open(temp_file, "w", encoding="utf-8") as f:
+            opened = True
+            count = esp2dsd_to_file(
+                Path(translation_plugin),
+                Path(original_plugin),
+                f,
+                progress_callback=progress_callback,
+                cache=string_cache,
+                memo=string_memo,
+                compact=compact,
+                timings=timings,
+            )
+    finally:
+        if count == 0:
+            # Errors opening the temporary file are not hidden by removing it
+            if opened:
+                os.remove(temp_file)
+
+            if created_dir:
+                try:
+                    os.rmdir(output_dir)
+                except OSError:
+                    pass
+
+    if count == 0:
+        return False
+
+    with measure(timings, "write"):
+        os.replace(temp_file, output_file)
+
+    return True
+
+
+# Queue for progress messages of the current worker process
+_progress_queue: Queue | None = None
+
+# String cache of the current worker process
+_string_cache: StringCache | None = None
+
+
+def init_worker(
+    progress_queue: Queue | None,
+    string_cache: StringCache | None = None,
+    index_scheme: str = IndexScheme.Blake2.value,
+):
+    global _progress_queue, _string_cache
+
+    # Passed by value since the enum class of the main process
+    # may be in another package
+    Record.index_scheme = IndexScheme(index_scheme)
+
+    _progress_queue = progress_queue
+    _string_cache = string_cache
+
+
+def convert_pair_in_worker(
+    translation_plugin: str,
+    original_plugin: str,
+    output_file: str,
+    compact: bool = False,
+    collect_timings: bool = False,
+    string_memo: StringMemo | None = None,
+) -> bool | tuple[bool, dict]:
+    """
+    Runs `convert_pair()` in a worker process and sends its progress
+    to the queue passed to `init_worker()`.
+
+    If `collect_timings` is True, the timings of the conversion are returned
+    together with the result, as dict since the `Timings` class of the main
+    process may be in another package.
+    """
+
+    progress_callback = None
+
+    if _progress_queue is not None:
+        progress_queue = _progress_queue
+
+        def progress_callback(plugin: Path, current: int, total: int):
+            progress_queue.put((output_file, plugin.name, current, total))
+
+    timings = Timings() if collect_timings else None
+
+    result = convert_pair(
+        translation_plugin,
+        original_plugin,
+        output_file,
+        progress_callback,
+        _string_cache,
+        string_memo,
+        compact,
+        timings,
+    )
+
+    if timings is not None:
+        return result, timings.to_dict()
+
+    return result
+
+
+def convert_pairs_in_worker(
+    pairs: list[tuple[str, str, str, bool]], collect_timings: bool = False
+) -> list[bool | tuple[bool, dict] | Exception]:
+    """
+    Runs `convert_pair_in_worker()` for translation pairs with the same
+    original plugin, which is only extracted and indexed once for all of them.
+
+    `pairs` are tuples of translation plugin, original plugin, output file
+    and compact flag. Returns the result or the raised exception of each pair.
+    """
+
+    string_memo = StringMemo()
+    results: list[bool | tuple[bool, dict] | Exception] = []
+
+    for translation_plugin, original_plugin, output_file, compact in pairs:
+        try:
+            result = convert_pair_in_worker(
+                translation_plugin,
+                original_plugin,
+                output_file,
+                compact,
+                collect_timings,
+                string_memo,
+            )
+        except Exception as ex:
+            result = ex
+
+        results.append(result)
+
+    return results
+
+
+def get_worker_function(function: Callable) -> Callable:
+    """
+    Returns `function` from the top-level "esp2dsd" package.
+
+    Worker processes import functions by their module name. The package
+    that contains "esp2dsd" when running inside Mod Organizer 2 imports
+    mobase and PyQt6, which are not available in worker processes.
+    """
+
+    package_dir = str(Path(__file__).resolve().parent.parent)
+    if package_dir not in sys.path:
+        sys.path.append(package_dir)
+
+    module_name = "esp2dsd." + function.__module__.rsplit(".", 1)[-1]
+
+    return getattr(importlib.import_module(module_name), function.__name__)
+
+
+def find_python_executable() -> str | None:
+    """
+    Returns the Python executable used for worker processes.
+
+    Embedding applications like Mod Organizer 2 report themselves
+    as `sys.executable`, so a Python executable is searched next to
+    the interpreter in that case.
+    """
+
+    if Path(sys.executable).stem.lower().startswith("python"):
+        return sys.executable
+
+    for prefix in (sys.exec_prefix, sys.base_exec_prefix):
+        for name in ("pythonw.exe", "python.exe", "bin/python3"):
+            executable = Path(prefix) / name
+            if executable.is_file():
+                return str(executable)
+
+    return None
+
+
+class BatchConverter:
+    """
+    Converts translation pairs in parallel worker processes.
+    """
+
+    max_workers: int
+    progress_callback: Callable[[ConversionJob, str, int, int], None] | None
+    string_cache: StringCache | None
+    report: RunReport | None
+
+    log = logging.getLogger("esp2dsd.batch.BatchConverter")
+
+    def __init__(
+        self,
+        max_workers: int = 0,
+        progress_callback: Callable[[ConversionJob, str, int, int], None] | None = None,
+        string_cache: StringCache | None = None,
+        report: RunReport | None = None,
+    ):
+        """
+        `max_workers` of 0 uses one worker per CPU core,
+        1 converts all pairs in the current process.
+
+        `progress_callback` is called with the job, the name of the plugin
+        that is currently scanned and its number of scanned and total groups.
+        It is always called from the thread that iterates `convert()`.
+
+        `string_cache` is shared by all workers to skip scanning plugins
+        that did not change since a previous conversion.
+
+        The results and timings of all jobs are added to `report` if given.
+        """
+
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.progress_callback = progress_callback
+        self.string_cache = string_cache
+        self.report = report
+        self.__cancel_event = threading.Event()
+
+        # ProcessPoolExecutor limit on Windows
+        if sys.platform == "win32":
+            self.max_workers = min(self.max_workers, 61)
+
+    def cancel(self):
+        """
+        Stops the conversion after the pairs that are currently converted.
+
+        Can be called from any thread.
+        """
+
+        self.__cancel_event.set()
+
+    @property
+    def is_canceled(self) -> bool:
+        return self.__cancel_event.is_set()
+
+    def convert(
+        self, jobs: list[ConversionJob]
+    ) -> Iterator[tuple[ConversionJob, bool | Exception]]:
+        """
+        Converts `jobs` and yields their results as soon as they finish.
+
+        A result is either the return value of `convert_pair()`
+        or the exception raised while converting. Jobs that were
+        not started before `cancel()` was called are not yielded.
+        """
+
+        executable = find_python_executable()
+
+        if self.max_workers <= 1 or len(jobs) <= 1 or executable is None:
+            if executable is None:
+                self.log.warning(
+                    "No Python executable found for worker processes, "
+                    "converting in current process..."
+                )
+
+            yield from self.convert_in_process(jobs)
+        else:
+            yield from self.convert_in_workers(jobs, executable)
+
+    def convert_in_process(
+        self, jobs: list[ConversionJob]
+    ) -> Iterator[tuple[ConversionJob, bool | Exception]]:
+        string_memo = StringMemo()
+
+        for job in jobs:
+            if self.is_canceled:
+                self.log.info("Conversion canceled.")
+                break
+
+            progress_callback = None
+            if self.progress_callback is not None:
+                progress_callback = (
+                    lambda plugin, current, total, job=job: self.progress_callback(
+                        job, plugin.name, current, total
+                    )
+                )
+
+            timings = Timings() if self.report is not None else None
+
+            try:
+                result = convert_pair(
+                    job.translation_plugin,
+                    job.original_plugin,
+                    job.output_file,
+                    progress_callback,
+                    self.string_cache,
+                    string_memo,
+                    job.compact,
+                    timings,
+                )
+            except Exception as ex:
+                result = ex
+
+            if self.report is not None:
+                self.report.add_pair(
+                    job.translation_plugin, job.original_plugin, result, timings
+                )
+
+            yield job, result
+
+    def convert_in_workers(
+        self, jobs: list[ConversionJob], executable: str
+    ) -> Iterator[tuple[ConversionJob, bool | Exception]]:
+        context = multiprocessing.get_context("spawn")
+        context.set_executable(executable)
+        worker = get_worker_function(convert_pairs_in_worker)
+        initializer = get_worker_function(init_worker)
+        progress_queue = context.Queue() if self.progress_callback else None
+        jobs_by_output = {job.output_file: job for job in jobs}
+
+        # Pairs with the same original are converted by the same worker,
+        # so that the original is only extracted and indexed once
+        jobs_by_original: dict[str, list[ConversionJob]] = {}
+        for job in jobs:
+            key = os.path.normcase(os.path.abspath(job.original_plugin))
+            jobs_by_original.setdefault(key, []).append(job)
+
+        self.log.debug(
+            f"Converting {len(jobs)} pair(s) of {len(jobs_by_original)} original(s) "
+            f"with {self.max_workers} worker(s)..."
+        )
+
+        with ProcessPoolExecutor(
+            min(self.max_workers, len(jobs_by_original)),
+            mp_context=context,
+            initializer=initializer,
+            initargs=(progress_queue, self.string_cache, Record.index_scheme.value),
+        ) as executor:
+            futures: dict[Future, list[ConversionJob]] = {
+                executor.submit(
+                    worker,
+                    [
+                        (
+                            job.translation_plugin,
+                            job.original_plugin,
+                            job.output_file,
+                            job.compact,
+                        )
+                        for job in original_jobs
+                    ],
+                    self.report is not None,
+                ): original_jobs
+                for original_jobs in jobs_by_original.values()
+            }
+            try:
+                pending = set(futures)
+                canceled = False
+
+                while pending:
+                    if self.is_canceled and not canceled:
+                        self.log.info("Conversion canceled.")
+                        canceled = True
+
+                        # Only pairs that are already converted are finished
+                        for future in list(pending):
+                            if future.cancel():
+                                pending.remove(future)
+
+                        if not pending:
+                            break
+
+                    done, pending = wait(
+                        pending, timeout=0.1, return_when=FIRST_COMPLETED
+                    )
+
+                    if progress_queue is not None:
+                        self.forward_progress(progress_queue, jobs_by_output)
+
+                    for future in done:
+                        original_jobs = futures[future]
+
+                        try:
+                            results = future.result()
+                        except Exception as ex:
+                            # The worker failed, e.g. because it was terminated
+                            results = [ex] * len(original_jobs)
+
+                        for job, result in zip(original_jobs, results):
+                            timings = None
+
+                            if self.report is not None:
+                                if isinstance(result, tuple):
+                                    result, timings_data = result
+                                    timings = Timings.from_dict(timings_data)
+
+                                self.report.add_pair(
+                                    job.translation_plugin,
+                                    job.original_plugin,
+                                    result,
+                                    timings,
+                                )
+
+                            yield job, result
+            finally:
+                # Queued pairs are not started if the caller stopped iterating,
+                # only the pairs that are already converted are waited for
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def forward_progress(
+        self,
+        progress_queue: Queue,
+        jobs_by_output: dict[str, ConversionJob],
+    ):
+        """
+        Passes progress messages from worker processes to `progress_callback`.
+        """
+
+        while True:
+            try:
+                output_file, plugin_name, current, total = progress_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            self.progress_callback(jobs_by_output[output_file], plugin_name, current, total)
@@ -0,0 +1,118 @@
+"""
+Matching of plugins and mods against the blacklist.
+"""
+
+import fnmatch
+import logging
+import re
+from typing import Iterable, Pattern
+
+
+class Blacklist:
+    """
+    Compiled blacklist of plugins, mod folders and mod ids.
+
+    Syntax, one entry per line:
+    - `SomePatch.esp`: plugin name
+    - `SomeMod/`: mod folder
+    - `@123456`: mod id from `meta.ini`
+    - `*_RU.esp` or `*_RU/`: glob pattern for plugins or mod folders,
+      only `*` and `?` are wildcards, so names like `[SE] Some Mod/` match literally
+    - `re:.*_(RU|UA)\\.esp` or `re:.*_RU/`: regular expression for plugins or mod folders
+    - Lines starting with `#` are comments.
+
+    All entries are case-insensitive. Names are looked up in sets,
+    patterns are combined into a single regular expression if they
+    do not conflict. Glob entries also match their literal name.
+    """
+
+    files: frozenset[str]
+    folders: frozenset[str]
+    modids: frozenset[str]
+    file_patterns: list[Pattern[str]]
+    folder_patterns: list[Pattern[str]]
+
+    GLOB_CHARS = frozenset("*?")
+    REGEX_PREFIX = "re:"
+
+    log = logging.getLogger("esp2dsd.Blacklist")
+
+    def __init__(self, lines: Iterable[str] = ()):
+        files: set[str] = set()
+        folders: set[str] = set()
+        modids: set[str] = set()
+        file_patterns: list[str] = []
+        folder_patterns: list[str] = []
+
+        for line in lines:
+            item = line.strip()
+            if not item or item.startswith("#"):
+                continue
+
+            if item.startswith("@"):
+                modids.add(item[1:].lower())
+                continue
+
+            is_folder = item.endswith("/")
+            if is_folder:
+                item = item[:-1]
+
+            if item.startswith(self.REGEX_PREFIX):
+                pattern = item[len(self.REGEX_PREFIX) :]
+                try:
+                    re.compile(pattern)
+                    # Full match like globs
+                    pattern = rf"(?:{pattern})\Z"
+                    re.compile(pattern)
+                except re.error as ex:
+                    self.log.warning(f"Invalid blacklist pattern {item!r}: {ex}")
+                    continue
+            elif not self.GLOB_CHARS.isdisjoint(item):
+                (folders if is_folder else files).add(item.lower())
+                # Brackets are common in mod names and are matched literally
+                pattern = fnmatch.translate(item.replace("[", "[[]"))
+            else:
+                (folders if is_folder else files).add(item.lower())
+                continue
+
+            (folder_patterns if is_folder else file_patterns).append(pattern)
+
+        self.files = frozenset(files)
+        self.folders = frozenset(folders)
+        self.modids = frozenset(modids)
+        self.file_patterns = self.compile(file_patterns)
+        self.folder_patterns = self.compile(folder_patterns)
+
+    @classmethod
+    def compile(cls, patterns: list[str]) -> list[Pattern[str]]:
+        """
+        Combines `patterns` into a single regular expression if possible.
+        """
+
+        if not patterns:
+            return []
+
+        try:
+            return [
+                re.compile(
+                    "|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE
+                )
+            ]
+        except re.error as ex:
+            # For eg. group names that are used in several entries
+            cls.log.warning(f"Failed to combine blacklist patterns: {ex}")
+
+        return [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+
+    def is_file_blacklisted(self, file_name: str) -> bool:
+        return file_name.lower() in self.files or any(
+            pattern.match(file_name) is not None for pattern in self.file_patterns
+        )
+
+    def is_folder_blacklisted(self, mod_name: str) -> bool:
+        return mod_name.lower() in self.folders or any(
+            pattern.match(mod_name) is not None for pattern in self.folder_patterns
+        )
+
+    def is_modid_blacklisted(self, modid: str | None) -> bool:
+        return modid is not None and modid.lower() in self.modids
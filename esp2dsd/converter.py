@@ -4,47 +4,220 @@ Copyright (c) Cutleast
 Script to convert a plugin translation to a DSD file.
 """
 
-from copy import copy
+from collections import OrderedDict
+from io import StringIO
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, TextIO
 import logging
 
-from .plugin_interface import Plugin
+from .instrumentation import PluginTiming, Timings, measure_plugin
+from .plugin_interface import StringScanner
 from .plugin_interface.plugin_string import PluginString as String
+from .string_cache import StringCache
+from .string_index import StringIndex
 import json
 
 log = logging.getLogger("esp2dsd.converter")
 
+# Increase when the generated DSD configs change for the same plugins
+CONVERTER_VERSION = 4
 
-def merge_plugin_strings(
-    translation_plugin: Path, original_plugin: Path, debug: bool = False
+
+def get_scan_progress_callback(
+    plugin: Path, progress_callback: Callable[[Path, int, int], None] | None
+) -> Callable[[int, int], None] | None:
+    if progress_callback is None:
+        return None
+
+    return lambda current, total: progress_callback(plugin, current, total)
+
+
+def extract_strings(
+    plugin: Path,
+    cache: StringCache | None = None,
+    progress_callback: Callable[[Path, int, int], None] | None = None,
+    timing: PluginTiming | None = None,
 ) -> list[String]:
     """
-    Extracts strings from translation and original plugin and merges them.
+    Extracts strings from a plugin or loads them from `cache`.
+    Cache hits are marked on `timing` if given.
+    """
+
+    if cache is not None:
+        strings = cache.get(plugin)
+
+        if strings is not None:
+            if timing is not None:
+                timing.cached = True
+
+            return strings
+
+    strings = list(
+        StringScanner(plugin).scan(
+            progress_callback=get_scan_progress_callback(plugin, progress_callback)
+        )
+    )
+
+    if cache is not None:
+        cache.put(plugin, strings)
+
+    return strings
+
+
+class StringMemo:
+    """
+    Keeps the extracted strings and original indices of plugins in memory
+    for the duration of a run, so that plugins that are part of several
+    translation pairs are only extracted and indexed once.
+
+    Least recently used plugins are dropped once the memo holds
+    more than `max_strings` strings. The bound is a number of strings,
+    not of bytes, and applies to each memo: `BatchConverter` uses one memo
+    per run when converting in the current process and one per group of
+    pairs with the same original plugin in worker processes.
+    """
+
+    max_strings: int
+
+    def __init__(self, max_strings: int = 500_000):
+        self.max_strings = max_strings
+        self.__entries: OrderedDict[
+            tuple[str, int, int], tuple[list[String], StringIndex | None]
+        ] = OrderedDict()
+        self.__size = 0
+
+    @staticmethod
+    def get_key(plugin: Path) -> tuple[str, int, int]:
+        stat = plugin.stat()
+
+        return (str(plugin.resolve()), stat.st_size, stat.st_mtime_ns)
+
+    def get_strings(
+        self,
+        plugin: Path,
+        cache: StringCache | None = None,
+        progress_callback: Callable[[Path, int, int], None] | None = None,
+        timing: PluginTiming | None = None,
+    ) -> list[String]:
+        return self.__get_entry(plugin, cache, progress_callback, timing)[1][0]
+
+    def get_index(
+        self,
+        plugin: Path,
+        cache: StringCache | None = None,
+        progress_callback: Callable[[Path, int, int], None] | None = None,
+    ) -> StringIndex:
+        key, (strings, index) = self.__get_entry(plugin, cache, progress_callback)
+
+        if index is None:
+            index = StringIndex(strings)
+            self.__entries[key] = (strings, index)
+
+        return index
+
+    def __get_entry(
+        self,
+        plugin: Path,
+        cache: StringCache | None,
+        progress_callback: Callable[[Path, int, int], None] | None,
+        timing: PluginTiming | None = None,
+    ) -> tuple[tuple[str, int, int], tuple[list[String], StringIndex | None]]:
+        key = self.get_key(plugin)
+        entry = self.__entries.get(key)
+
+        if entry is not None:
+            if timing is not None:
+                timing.cached = True
+
+            self.__entries.move_to_end(key)
+            return key, entry
+
+        strings = extract_strings(plugin, cache, progress_callback, timing)
+        entry = (strings, None)
+        self.__entries[key] = entry
+        self.__size += len(strings)
+
+        # Drop least recently used plugins but keep the current one
+        while self.__size > self.max_strings and len(self.__entries) > 1:
+            _, (old_strings, _) = self.__entries.popitem(last=False)
+            self.__size -= len(old_strings)
+
+        return key, entry
+
+
+def load_plugin_strings(
+    translation_plugin: Path,
+    original_plugin: Path,
+    progress_callback: Callable[[Path, int, int], None] | None = None,
+    cache: StringCache | None = None,
+    original_index: StringIndex | None = None,
+    memo: StringMemo | None = None,
+    timings: Timings | None = None,
+) -> tuple[list[String], StringIndex]:
+    """
+    Extracts the strings of the translation plugin and indexes
+    the strings of the original plugin.
+
+    See `iter_merged_strings()` for the parameters. The extraction of each
+    plugin is recorded in `timings` if given.
     """
 
-    plugin = Plugin(translation_plugin)
-    translation_strings = plugin.extract_strings()
+    with measure_plugin(timings, "parse translation", translation_plugin) as timing:
+        if memo is not None:
+            translation_strings = memo.get_strings(
+                translation_plugin, cache, progress_callback, timing
+            )
+        else:
+            translation_strings = extract_strings(
+                translation_plugin, cache, progress_callback, timing
+            )
+
+        if timing is not None:
+            timing.strings = len(translation_strings)
+
+    if original_index is not None:
+        return translation_strings, original_index
+
+    with measure_plugin(timings, "parse original", original_plugin) as timing:
+        if memo is not None:
+            strings = memo.get_strings(
+                original_plugin, cache, progress_callback, timing
+            )
+            original_strings = memo.get_index(original_plugin, cache, progress_callback)
+        else:
+            strings = extract_strings(
+                original_plugin, cache, progress_callback, timing
+            )
+            original_strings = StringIndex(strings)
+
+        # Extracted strings like for translations, not the deduplicated keys
+        if timing is not None:
+            timing.strings = len(strings)
+
+    return translation_strings, original_strings
 
-    plugin = Plugin(original_plugin)
-    original_strings = {
-        f"{(string.form_id.lower() if string.form_id is not None else '')}###{string.editor_id}###{string.type}###{string.index}": string
-        for string in plugin.extract_strings()
-    }
+
+def join_plugin_strings(
+    translation_strings: list[String],
+    original_strings: StringIndex,
+    debug: bool = False,
+) -> Iterator[String]:
+    """
+    Yields the translated strings that have a different original string
+    as merged strings.
+    """
 
     if debug:
         log.debug(
             f"Merging {len(original_strings)} original String(s) to {len(translation_strings)} translated String(s)..."
         )
 
-    merged_strings: list[String] = []
-
+    merged_strings = 0
     skipped_strings = 0
 
-    for translation_string in translation_strings:
-        original_string = original_strings.get(
-            f"{(translation_string.form_id.lower() if translation_string.form_id is not None else '')}###{translation_string.editor_id}###{translation_string.type}###{translation_string.index}"
-        )
-
+    for translation_string, original_string in original_strings.join(
+        translation_strings
+    ):
         if original_string is None:
             if debug:
                 log.warning(f"Not found in Original: {translation_string}")
@@ -53,28 +226,208 @@ def merge_plugin_strings(
             skipped_strings += 1
             continue
 
-        translation_string = copy(translation_string)
-        translation_string.translated_string = translation_string.original_string
-        translation_string.original_string = original_string.original_string
-        translation_string.status = String.Status.TranslationComplete
-        merged_strings.append(translation_string)
+        merged_strings += 1
+        yield String(
+            translation_string.editor_id,
+            translation_string.form_id,
+            translation_string.index,
+            translation_string.type,
+            original_string=original_string.original_string,
+            translated_string=translation_string.original_string,
+            status=String.Status.TranslationComplete,
+        )
 
     if debug:
         log.warning(f"Skipped {skipped_strings} duplicate/untranslated String(s)!")
-        log.debug(f"Merged {len(merged_strings)} String(s).")
+        log.debug(f"Merged {merged_strings} String(s).")
+
+
+def iter_merged_strings(
+    translation_plugin: Path,
+    original_plugin: Path,
+    debug: bool = False,
+    progress_callback: Callable[[Path, int, int], None] | None = None,
+    cache: StringCache | None = None,
+    original_index: StringIndex | None = None,
+    memo: StringMemo | None = None,
+) -> Iterator[String]:
+    """
+    Extracts strings from translation and original plugin and yields
+    the merged strings one by one.
+
+    `progress_callback` is called with the plugin that is currently scanned
+    and the number of scanned and total groups of that plugin.
+    Plugins that are found in `cache` are not scanned at all.
+
+    The original plugin is not extracted if `original_index` is given.
+    Plugins already extracted in the same run are taken from `memo`.
+    """
+
+    translation_strings, original_strings = load_plugin_strings(
+        translation_plugin,
+        original_plugin,
+        progress_callback,
+        cache,
+        original_index,
+        memo,
+    )
+
+    yield from join_plugin_strings(translation_strings, original_strings, debug)
+
+
+def merge_plugin_strings(
+    translation_plugin: Path,
+    original_plugin: Path,
+    debug: bool = False,
+    progress_callback: Callable[[Path, int, int], None] | None = None,
+    cache: StringCache | None = None,
+    original_index: StringIndex | None = None,
+    memo: StringMemo | None = None,
+) -> list[String]:
+    """
+    Extracts strings from translation and original plugin and merges them.
+
+    See `iter_merged_strings()` for the parameters.
+    """
+
+    return list(
+        iter_merged_strings(
+            translation_plugin,
+            original_plugin,
+            debug,
+            progress_callback,
+            cache,
+            original_index,
+            memo,
+        )
+    )
+
+
+_indented_encoder = json.JSONEncoder(ensure_ascii=False, indent=4)
+_compact_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
 
-    return merged_strings
+
+def write_dsd_config(
+    strings: Iterable[String], file: TextIO, compact: bool = False
+) -> int:
+    """
+    Writes `strings` one by one to `file` in DSD config file format
+    and returns the number of written strings.
+
+    The output matches `json.dumps()` of all strings with an indentation
+    of 4 or without any whitespace if `compact` is True.
+    """
+
+    count = 0
+
+    file.write("[")
+
+    for string in strings:
+        if count:
+            file.write(",")
+
+        if compact:
+            file.write(_compact_encoder.encode(string.to_string_data()))
+        else:
+            text = _indented_encoder.encode(string.to_string_data())
+            file.write("\n    " + text.replace("\n", "\n    "))
+
+        count += 1
+
+    if count and not compact:
+        file.write("\n")
+
+    file.write("]")
+
+    return count
+
+
+def esp2dsd_to_file(
+    translation_plugin: Path,
+    original_plugin: Path,
+    file: TextIO,
+    debug: bool = False,
+    progress_callback: Callable[[Path, int, int], None] | None = None,
+    cache: StringCache | None = None,
+    original_index: StringIndex | None = None,
+    memo: StringMemo | None = None,
+    compact: bool = False,
+    timings: Timings | None = None,
+) -> int:
+    """
+    Converts a plugin translation to a DSD config written to `file`
+    and returns the number of strings in it.
+
+    If `timings` is given, the phases of the conversion are recorded in it.
+    Merging, serializing and writing are done one after the other then
+    instead of streaming the strings to `file`.
+    """
+
+    if timings is None:
+        return write_dsd_config(
+            iter_merged_strings(
+                translation_plugin,
+                original_plugin,
+                debug,
+                progress_callback,
+                cache,
+                original_index,
+                memo,
+            ),
+            file,
+            compact,
+        )
+
+    translation_strings, original_strings = load_plugin_strings(
+        translation_plugin,
+        original_plugin,
+        progress_callback,
+        cache,
+        original_index,
+        memo,
+        timings,
+    )
+
+    with timings.measure("merge"):
+        merged_strings = list(
+            join_plugin_strings(translation_strings, original_strings, debug)
+        )
+
+    with timings.measure("serialize"):
+        buffer = StringIO()
+        count = write_dsd_config(merged_strings, buffer, compact)
+
+    with timings.measure("write"):
+        file.write(buffer.getvalue())
+
+    return count
 
 
 def esp2dsd(
-    translation_plugin: Path, original_plugin: Path, debug: bool = False
+    translation_plugin: Path,
+    original_plugin: Path,
+    debug: bool = False,
+    progress_callback: Callable[[Path, int, int], None] | None = None,
+    cache: StringCache | None = None,
+    original_index: StringIndex | None = None,
+    memo: StringMemo | None = None,
+    compact: bool = False,
 ) -> str:
     """
     Converts a plugin translation to JSON string as DSD config file format.
     """
 
-    merged_strings = merge_plugin_strings(translation_plugin, original_plugin, debug)
-
-    string_data = [string.to_string_data() for string in merged_strings]
+    file = StringIO()
+    esp2dsd_to_file(
+        translation_plugin,
+        original_plugin,
+        file,
+        debug,
+        progress_callback,
+        cache,
+        original_index,
+        memo,
+        compact,
+    )
 
-    return json.dumps(string_data, ensure_ascii=False, indent=4)
+    return file.getvalue()
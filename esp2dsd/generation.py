@@ -0,0 +1,321 @@
+"""
+Discovery of translation pairs in a load order and generation of their DSD configs
+into an output mod.
+"""
+
+import logging
+import os
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from .batch import BatchConverter, ConversionJob
+from .blacklist import Blacklist
+from .incorrect_pairs import IncorrectPairs
+from .instrumentation import RunReport, measure
+from .load_order import LoadOrder
+from .manifest import OutputManifest
+from .scan_index import ModScanIndex, PluginStat
+
+CONFIG_DIR = os.path.join("SKSE", "Plugins", "DynamicStringDistributor")
+"""
+Directory of the DSD configs relative to a mod.
+"""
+
+log = logging.getLogger("esp2dsd.generation")
+
+
+@dataclass(slots=True)
+class TranslationFile:
+    """
+    Class for a translation plugin and the original plugin it overrides.
+    """
+
+    path: str
+    original: str
+    mod_name: str
+    priority: int
+    """
+    Priority of the mod of the translation in the load order.
+    """
+
+
+@dataclass
+class GenerationResult:
+    """
+    Class for the outcome of generating the DSD configs of translation pairs.
+    """
+
+    output_files_count: int = 0
+    """
+    Number of translation pairs with a DSD config in the output mod.
+    """
+
+    empty: list[str] = field(default_factory=list)
+    """
+    Plugins whose config was empty, recorded as incorrect pairs.
+    """
+
+    errors: dict[str, Exception] = field(default_factory=dict)
+    """
+    Errors by plugin name.
+    """
+
+
+def is_valid_translation_pair(
+    original_plugin: str,
+    translation_plugin: str,
+    incorrect_pairs: IncorrectPairs | None = None,
+    original_stat: PluginStat | None = None,
+    translation_stat: PluginStat | None = None,
+) -> bool:
+    """
+    Checks if `translation_plugin` can be a translation of `original_plugin`.
+
+    Their sizes must not differ by more than 20% and the pair must not be
+    recorded in `incorrect_pairs`. The file stats are read if not given.
+    """
+
+    log.debug(f"Checking file pair: {original_plugin} <-> {translation_plugin}")
+
+    try:
+        if original_stat is None:
+            stat = os.stat(original_plugin)
+            original_stat = (stat.st_size, stat.st_mtime)
+        if translation_stat is None:
+            stat = os.stat(translation_plugin)
+            translation_stat = (stat.st_size, stat.st_mtime)
+
+        original_size = original_stat[0]
+        translation_size = translation_stat[0]
+
+        if (
+            translation_size > original_size * 1.2
+            or translation_size < original_size * 0.8
+        ):
+            return False
+
+        return incorrect_pairs is None or not incorrect_pairs.is_incorrect(
+            original_plugin, original_stat, translation_stat
+        )
+    except Exception as ex:
+        log.warning(f"Error checking file pair: {ex}")
+        return False
+
+
+def find_translation_files(
+    load_order: LoadOrder,
+    scan_index: ModScanIndex,
+    blacklist: Blacklist,
+    incorrect_pairs: IncorrectPairs | None = None,
+    report: RunReport | None = None,
+) -> dict[str, TranslationFile]:
+    """
+    Finds plugins of active mods that override a plugin of a mod
+    with lower priority and are a valid translation of it.
+
+    Returns the translations by plugin name. If several mods override
+    the same plugin, the valid translation with the highest priority is used.
+    """
+
+    original_files: dict[str, str] = {}
+    original_mods: dict[str, str] = {}
+    original_stats: dict[str, PluginStat] = {}
+    refreshed_originals: set[str] = set()
+    translation_files: dict[str, TranslationFile] = {}
+
+    for mod in load_order.active_mods:
+        if blacklist.is_folder_blacklisted(mod.name):
+            log.debug(f"Skipping mod {mod.name} due to folder blacklist")
+            continue
+
+        if blacklist.modids and blacklist.is_modid_blacklisted(
+            scan_index.get_modid(mod.path)
+        ):
+            log.debug(f"Skipping mod {mod.name} due to modid blacklist")
+            continue
+
+        # Only plugins in the top level of the mod are loaded by the game
+        try:
+            plugins = scan_index.get_plugins(mod.path)
+        except Exception as ex:
+            log.warning(f"Failed to list files in {mod.path}: {ex}")
+            continue
+
+        for file, plugin_stat in plugins.items():
+            if blacklist.is_file_blacklisted(file):
+                continue
+
+            full_path = os.path.join(mod.path, file)
+
+            if file not in original_files:
+                original_files[file] = full_path
+                original_mods[file] = mod.path
+                original_stats[file] = plugin_stat
+                continue
+
+            # The scan index does not notice plugins overwritten in place,
+            # so the stats of both plugins of a pair are read again
+            try:
+                if file not in refreshed_originals:
+                    original_stats[file] = scan_index.refresh_plugin_stat(
+                        original_mods[file], file
+                    )
+                    refreshed_originals.add(file)
+                plugin_stat = scan_index.refresh_plugin_stat(mod.path, file)
+            except OSError as ex:
+                log.warning(f"Failed to read file stats of {file}: {ex}")
+                continue
+
+            with measure(report, "validate"):
+                valid = is_valid_translation_pair(
+                    original_files[file],
+                    full_path,
+                    incorrect_pairs,
+                    original_stats[file],
+                    plugin_stat,
+                )
+
+            if not valid:
+                log.info(
+                    f"Skipping invalid translation pair: {original_files[file]} -> {full_path}"
+                )
+                continue
+
+            previous = translation_files.get(file)
+            if previous is not None and previous.priority > mod.priority:
+                continue
+
+            translation_files[file] = TranslationFile(
+                full_path, original_files[file], mod.name, mod.priority
+            )
+
+    return translation_files
+
+
+def get_output_file(output_mod_path: str, plugin_name: str) -> str:
+    return os.path.join(output_mod_path, CONFIG_DIR, plugin_name, plugin_name + ".json")
+
+
+def copy_to_translation_patch(translation: TranslationFile, output_file: str):
+    """
+    Copies the config into the mod of the translation and hides the translation
+    plugin with a ".mohidden" suffix.
+    """
+
+    if not (
+        os.path.exists(translation.path) and os.access(translation.path, os.W_OK)
+    ):
+        log.critical(f"Cannot access file for renaming: {translation.path}")
+        return
+
+    if os.path.exists(translation.path + ".mohidden"):
+        log.warning(
+            f"Skipped renaming {translation.path}: .mohidden file already exists"
+        )
+        return
+
+    os.rename(translation.path, translation.path + ".mohidden")
+
+    plugin_name = os.path.basename(translation.path)
+    copy_to_dir = os.path.join(os.path.dirname(translation.path), CONFIG_DIR, plugin_name)
+    os.makedirs(copy_to_dir, exist_ok=True)
+    shutil.copy2(output_file, os.path.join(copy_to_dir, os.path.basename(output_file)))
+
+
+def convert_translation_files(
+    translation_files: dict[str, TranslationFile],
+    output_mod_path: str,
+    converter: BatchConverter,
+    on_converted: Callable[[ConversionJob, bool | Exception | None], None] | None = None,
+    incorrect_pairs: IncorrectPairs | None = None,
+    copy_to_patch_dir: bool = False,
+    compact: bool = False,
+    report: RunReport | None = None,
+) -> GenerationResult:
+    """
+    Generates the DSD configs of `translation_files` into the output mod.
+
+    Configs whose plugins did not change since the last run are kept,
+    configs of pairs that no longer exist are removed. `on_converted` is
+    called for each pair with its result, or None if it was up to date.
+
+    Pairs with an empty config are recorded in `incorrect_pairs`.
+    If `copy_to_patch_dir` is True, the configs are also copied into
+    the mods of the translations, see `copy_to_translation_patch()`.
+    """
+
+    jobs: dict[str, ConversionJob] = {
+        file: ConversionJob(
+            translation.path,
+            translation.original,
+            get_output_file(output_mod_path, file),
+            compact,
+        )
+        for file, translation in translation_files.items()
+    }
+
+    # The manifest records the plugins of each config, only configs
+    # with changed plugins are generated again
+    manifest = OutputManifest(Path(output_mod_path))
+    manifest.load()
+    for removed_file in manifest.remove_stale(list(jobs.values())):
+        log.info(f"Removed config of missing translation pair: {removed_file}")
+
+    results: dict[str, bool | Exception] = {}
+    pending_jobs: list[ConversionJob] = []
+    for job in jobs.values():
+        if manifest.is_up_to_date(job):
+            results[job.output_file] = True
+
+            if on_converted is not None:
+                on_converted(job, None)
+        else:
+            pending_jobs.append(job)
+    log.debug(f"{len(results)} DSD configurations are up to date.")
+
+    try:
+        with measure(report, "convert"):
+            for job, result in converter.convert(pending_jobs):
+                results[job.output_file] = result
+                if not isinstance(result, Exception):
+                    manifest.update(job, result)
+
+                if on_converted is not None:
+                    on_converted(job, result)
+    finally:
+        manifest.save()
+
+    # Handle results in the original order so that recording incorrect pairs
+    # and hiding translations is deterministic. Pairs that were not converted
+    # before a cancellation are skipped.
+    generation_result = GenerationResult()
+
+    for file, job in jobs.items():
+        if job.output_file not in results:
+            continue
+
+        result = results[job.output_file]
+        translation = translation_files[file]
+
+        if isinstance(result, Exception):
+            generation_result.errors[file] = result
+        elif not result:
+            generation_result.empty.append(file)
+
+            if incorrect_pairs is not None:
+                try:
+                    incorrect_pairs.add(translation.original, translation.path)
+                except Exception as ex:
+                    log.warning(f"Error recording incorrect pair: {ex}")
+
+            log.warning(f"Empty config generated for {file}, recorded as incorrect pair")
+        else:
+            if copy_to_patch_dir:
+                with measure(report, "copy/rename"):
+                    copy_to_translation_patch(translation, job.output_file)
+
+            generation_result.output_files_count += 1
+
+    return generation_result
@@ -0,0 +1,125 @@
+"""
+Persistent record of translation pairs that produced empty DSD configs.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+
+from .scan_index import PluginStat
+
+
+class IncorrectPairs:
+    """
+    Remembers original and translation plugins that turned out not to be
+    a translation pair, identified by their size and modification time,
+    so that they are skipped until one of them changes.
+
+    The file is read again when it was modified by another process.
+    """
+
+    path: Path
+    pairs: dict[str, dict]
+    """
+    Original plugin and incorrect translations by plugin name.
+    """
+
+    log = logging.getLogger("esp2dsd.IncorrectPairs")
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.pairs = {}
+        self.__mtime: float | None = None
+
+    def load(self):
+        """
+        Loads the file if it changed since it was last loaded or saved.
+        """
+
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            self.pairs = {}
+            self.__mtime = None
+            return
+
+        if mtime == self.__mtime:
+            return
+
+        try:
+            with self.path.open(encoding="utf-8") as file:
+                self.pairs = json.load(file)
+        except (OSError, ValueError) as ex:
+            self.log.warning(f"Failed to load incorrect pairs {str(self.path)!r}: {ex}")
+            self.pairs = {}
+            return
+
+        self.__mtime = mtime
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("w", encoding="utf-8") as file:
+            json.dump(self.pairs, file, indent=2, ensure_ascii=False)
+
+        self.__mtime = os.path.getmtime(self.path)
+
+    def is_incorrect(
+        self, original_plugin: str, original_stat: PluginStat, translation_stat: PluginStat
+    ) -> bool:
+        """
+        Checks if the pair was recorded with the same versions of both plugins.
+        """
+
+        self.load()
+
+        pair = self.pairs.get(os.path.basename(original_plugin))
+        if pair is None:
+            return False
+
+        original_size, original_mtime = original_stat
+        if (
+            pair["original"]["size"] != original_size
+            or pair["original"]["mtime"] != original_mtime
+        ):
+            return False
+
+        translation_size, translation_mtime = translation_stat
+
+        return any(
+            translation["size"] == translation_size
+            and translation["mtime"] == translation_mtime
+            for translation in pair.get("translations", [])
+        )
+
+    def add(self, original_plugin: str, translation_plugin: str):
+        """
+        Records an incorrect pair and saves the file.
+
+        The recorded translations of a plugin are reset when the original changed.
+        """
+
+        self.load()
+
+        original_stat = self.get_stat(original_plugin)
+        translation_stat = self.get_stat(translation_plugin)
+        file_name = os.path.basename(original_plugin)
+        pair = self.pairs.get(file_name)
+
+        if pair is None or pair["original"] != original_stat:
+            self.pairs[file_name] = {
+                "original": original_stat,
+                "translations": [translation_stat],
+            }
+        else:
+            translations: list[dict] = pair.setdefault("translations", [])
+            if translation_stat not in translations:
+                translations.append(translation_stat)
+
+        self.save()
+
+    @staticmethod
+    def get_stat(path: str) -> dict[str, float]:
+        stat = os.stat(path)
+
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
@@ -0,0 +1,220 @@
+"""
+Optional timing of the phases of a DSD config generation run.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import ContextManager, Iterator
+
+
+@dataclass(slots=True)
+class PluginTiming:
+    """
+    Class for the time spent on one plugin in one phase.
+    """
+
+    path: str
+    phase: str
+    seconds: float = 0.0
+    size: int = 0
+    """
+    Number of bytes read from the plugin.
+    """
+
+    strings: int = 0
+    """
+    Number of strings extracted from the plugin.
+    """
+
+    cached: bool = False
+    """
+    Whether the strings were loaded from the string cache or memo
+    and the plugin was not read.
+    """
+
+    @property
+    def throughput(self) -> float:
+        """
+        Bytes read per second in MB/s.
+        """
+
+        if not self.seconds or self.cached:
+            return 0.0
+
+        return self.size / 1024 / 1024 / self.seconds
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+
+        # Nothing was read, so there is no parse throughput to report
+        if self.cached:
+            del data["size"]
+            return data
+
+        return data | {"mb_per_s": round(self.throughput, 2)}
+
+
+class Timings:
+    """
+    Accumulated wall time per phase and the timings of single plugins.
+    """
+
+    phases: dict[str, float]
+    plugins: list[PluginTiming]
+
+    def __init__(self):
+        self.phases = {}
+        self.plugins = []
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[phase] = self.phases.get(phase, 0.0) + elapsed
+
+    @contextmanager
+    def measure_plugin(self, phase: str, path: Path) -> Iterator[PluginTiming]:
+        """
+        Measures `phase` for the plugin at `path`.
+        The number of extracted strings and whether they were cached
+        are set on the yielded timing.
+        """
+
+        timing = PluginTiming(str(path), phase)
+
+        try:
+            timing.size = path.stat().st_size
+        except OSError:
+            pass
+
+        with self.measure(phase):
+            start = time.perf_counter()
+            yield timing
+            timing.seconds = time.perf_counter() - start
+
+        self.plugins.append(timing)
+
+    def add(self, other: "Timings"):
+        for phase, seconds in other.phases.items():
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+        self.plugins.extend(other.plugins)
+
+    def to_dict(self) -> dict:
+        return {
+            "phases": {phase: round(seconds, 6) for phase, seconds in self.phases.items()},
+            "plugins": [timing.to_dict() for timing in self.plugins],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Timings":
+        timings = cls()
+        timings.phases = dict(data["phases"])
+        timings.plugins = [
+            PluginTiming(
+                timing["path"],
+                timing["phase"],
+                timing["seconds"],
+                timing.get("size", 0),
+                timing["strings"],
+                timing.get("cached", False),
+            )
+            for timing in data["plugins"]
+        ]
+
+        return timings
+
+
+class RunReport(Timings):
+    """
+    Timings of a whole run, written as machine-readable report into the output mod.
+
+    Phases of all pairs are summed up, so with worker processes the sum
+    of the conversion phases exceeds the wall time of the run.
+    """
+
+    pairs: list[dict]
+    started: float
+
+    FILE_NAME = "dsd_run_report.json"
+    FORMAT_VERSION = 1
+
+    def __init__(self):
+        super().__init__()
+        self.pairs = []
+        self.started = time.time()
+
+    def add_pair(
+        self,
+        translation_plugin: str,
+        original_plugin: str,
+        result: bool | Exception,
+        timings: Timings | None,
+    ):
+        """
+        Records the result of converting a translation pair and adds its timings.
+        """
+
+        pair = {
+            "translation": translation_plugin,
+            "original": original_plugin,
+            "result": result if isinstance(result, bool) else repr(result),
+        }
+
+        if timings is not None:
+            self.add(timings)
+            pair["phases"] = timings.to_dict()["phases"]
+
+        self.pairs.append(pair)
+
+    def save(self, output_mod_path: Path):
+        report = {
+            "format_version": self.FORMAT_VERSION,
+            "started": self.started,
+            "duration": round(time.time() - self.started, 6),
+            "pairs": self.pairs,
+        } | self.to_dict()
+
+        os.makedirs(output_mod_path, exist_ok=True)
+        path = output_mod_path / self.FILE_NAME
+        temp_path = path.with_name(self.FILE_NAME + ".tmp")
+        with temp_path.open("w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+
+_null_context = nullcontext()
+
+
+def measure(timings: Timings | None, phase: str) -> ContextManager[None]:
+    """
+    Returns `timings.measure(phase)` or a context that does nothing
+    if `timings` is None.
+    """
+
+    if timings is None:
+        return _null_context
+
+    return timings.measure(phase)
+
+
+def measure_plugin(
+    timings: Timings | None, phase: str, path: Path
+) -> ContextManager[PluginTiming | None]:
+    """
+    Returns `timings.measure_plugin(phase, path)` or a context that yields None
+    if `timings` is None.
+    """
+
+    if timings is None:
+        return _null_context
+
+    return timings.measure_plugin(phase, path)
@@ -0,0 +1,91 @@
+"""
+Snapshot of the mod load order of a profile.
+"""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+
+@dataclass(frozen=True, slots=True)
+class ModInfo:
+    """
+    Class for a mod in the load order.
+    """
+
+    name: str
+    priority: int
+    """
+    Position in the load order, mods with higher priority override lower ones.
+    """
+
+    active: bool
+    path: str
+    """
+    Absolute path of the mod directory.
+    """
+
+
+class LoadOrder:
+    """
+    Mods of a profile captured once per run so that later stages
+    do not have to query the mod manager again.
+    """
+
+    mods: list[ModInfo]
+    """
+    All mods sorted by priority, lowest first.
+    """
+
+    def __init__(self, mods: Iterable[ModInfo] = ()):
+        self.mods = sorted(mods, key=lambda mod: mod.priority)
+        self.__mods_by_name = {mod.name: mod for mod in self.mods}
+
+    @classmethod
+    def from_modlist(cls, modlist_file: Path, mods_dir: Path) -> "LoadOrder":
+        """
+        Reads the `modlist.txt` of a Mod Organizer 2 profile.
+
+        The file lists the mods with the highest priority first, prefixed with
+        "+" if they are active and "-" if not. Unmanaged mods ("*") like DLCs
+        have no directory in `mods_dir` and are skipped, as are mods
+        whose directory does not exist.
+        """
+
+        with modlist_file.open(encoding="utf-8-sig") as file:
+            lines = [
+                line.strip()
+                for line in file
+                if line.strip() and not line.startswith("#")
+            ]
+
+        mods: list[ModInfo] = []
+
+        for priority, line in enumerate(reversed(lines)):
+            state, name = line[0], line[1:]
+            path = os.path.join(mods_dir, name)
+
+            if state not in "+-" or not os.path.isdir(path):
+                continue
+
+            mods.append(ModInfo(name, priority, state == "+", os.path.abspath(path)))
+
+        return cls(mods)
+
+    def __len__(self) -> int:
+        return len(self.mods)
+
+    def __iter__(self) -> Iterator[ModInfo]:
+        return iter(self.mods)
+
+    def get(self, name: str) -> ModInfo | None:
+        return self.__mods_by_name.get(name)
+
+    @property
+    def active_mods(self) -> list[ModInfo]:
+        """
+        Active mods sorted by priority, lowest first.
+        """
+
+        return [mod for mod in self.mods if mod.active]
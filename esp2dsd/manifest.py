@@ -0,0 +1,260 @@
+"""
+Manifest of the DSD configs generated into an output mod.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+from .batch import ConversionJob
+from .converter import CONVERTER_VERSION
+from .plugin_interface.record import Record
+from .plugin_interface.string_table import StringTables
+
+
+class OutputManifest:
+    """
+    Records the translation and original plugin that each DSD config
+    in an output mod was generated from.
+
+    A config is up to date if size and modification time of both plugins
+    and their string tables are unchanged. If they changed, the recorded
+    file hashes are compared before the config is considered outdated.
+    """
+
+    output_mod_path: Path
+    entries: dict[str, dict]
+    """
+    Entries by path of the config relative to the output mod.
+    """
+
+    FILE_NAME = "dsd_manifest.json"
+    FORMAT_VERSION = 1
+
+    log = logging.getLogger("esp2dsd.OutputManifest")
+
+    def __init__(self, output_mod_path: Path):
+        self.output_mod_path = output_mod_path
+        self.entries = {}
+        self.__hashes: dict[tuple[str, int, int], str] = {}
+
+    @property
+    def path(self) -> Path:
+        return self.output_mod_path / self.FILE_NAME
+
+    def load(self):
+        """
+        Loads the manifest if the output mod has one and it was written
+        by the current converter version with the current index scheme.
+        """
+
+        self.entries = {}
+
+        try:
+            with self.path.open(encoding="utf-8") as file:
+                manifest = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as ex:
+            self.log.warning(f"Failed to load manifest {str(self.path)!r}: {ex}")
+            return
+
+        if (
+            manifest.get("format_version") != self.FORMAT_VERSION
+            or manifest.get("converter_version") != CONVERTER_VERSION
+            or manifest.get("index_scheme") != Record.index_scheme.value
+        ):
+            self.log.info("Manifest was written by another converter version.")
+            return
+
+        self.entries = manifest.get("entries", {})
+
+        # Files that did not change since they were recorded are not hashed again
+        for entry in self.entries.values():
+            for key in ("translation", "original"):
+                info = entry.get(key, {})
+
+                for file_info in [info, *info.get("string_tables", [])]:
+                    try:
+                        hash_key = (
+                            file_info["path"],
+                            file_info["size"],
+                            file_info["mtime"],
+                        )
+                        self.__hashes.setdefault(hash_key, file_info["hash"])
+                    except (KeyError, TypeError):
+                        pass
+
+    def save(self):
+        manifest = {
+            "format_version": self.FORMAT_VERSION,
+            "converter_version": CONVERTER_VERSION,
+            "index_scheme": Record.index_scheme.value,
+            "entries": self.entries,
+        }
+
+        os.makedirs(self.output_mod_path, exist_ok=True)
+        temp_path = self.path.with_name(self.FILE_NAME + ".tmp")
+        with temp_path.open("w", encoding="utf-8") as file:
+            json.dump(manifest, file, indent=2, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def get_key(self, job: ConversionJob) -> str:
+        return Path(job.output_file).relative_to(self.output_mod_path).as_posix()
+
+    def get_hash(self, path: str, stat: os.stat_result) -> str:
+        """
+        Returns the MD5 hash of a file, computed once per file version
+        and reused from the loaded manifest for recorded versions.
+        """
+
+        key = (path, stat.st_size, stat.st_mtime_ns)
+
+        if key not in self.__hashes:
+            with open(path, "rb") as file:
+                self.__hashes[key] = hashlib.file_digest(file, "md5").hexdigest()
+
+        return self.__hashes[key]
+
+    def get_file_info(self, path: str) -> dict:
+        stat = os.stat(path)
+
+        return {
+            "path": path,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "hash": self.get_hash(path, stat),
+        }
+
+    def get_input_info(self, path: str) -> dict:
+        """
+        Returns the file info of a plugin and its string tables.
+        """
+
+        localized = StringTables.is_localized(Path(path))
+
+        return self.get_file_info(path) | {
+            "localized": localized,
+            "string_tables": [
+                self.get_file_info(str(table))
+                for table in StringTables.get_files(Path(path))
+            ]
+            if localized
+            else [],
+        }
+
+    def is_input_unchanged(self, info: dict, path: str) -> bool:
+        if not self.is_file_unchanged(info, path):
+            return False
+
+        # An unchanged plugin that is not localized has no string tables
+        if info.get("localized") is False:
+            return True
+
+        tables = [str(table) for table in StringTables.get_files(Path(path))]
+        table_infos: list[dict] = info.get("string_tables", [])
+
+        return len(tables) == len(table_infos) and all(
+            self.is_file_unchanged(table_info, table)
+            for table_info, table in zip(table_infos, tables)
+        )
+
+    def is_file_unchanged(self, info: dict, path: str) -> bool:
+        if info["path"] != path:
+            return False
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+
+        if stat.st_size != info["size"]:
+            return False
+
+        if stat.st_mtime_ns == info["mtime"]:
+            return True
+
+        # Touched but possibly unchanged, e.g. by reinstalling a mod
+        if self.get_hash(path, stat) != info["hash"]:
+            return False
+
+        info["mtime"] = stat.st_mtime_ns
+        return True
+
+    def is_up_to_date(self, job: ConversionJob) -> bool:
+        """
+        Checks if the config of `job` exists and was generated from
+        the current versions of its plugins.
+        """
+
+        entry = self.entries.get(self.get_key(job))
+
+        return (
+            entry is not None
+            and os.path.isfile(job.output_file)
+            and entry.get("compact", False) == job.compact
+            and self.is_input_unchanged(entry["translation"], job.translation_plugin)
+            and self.is_input_unchanged(entry["original"], job.original_plugin)
+        )
+
+    def update(self, job: ConversionJob, generated: bool):
+        """
+        Records the result of converting `job`.
+        """
+
+        key = self.get_key(job)
+
+        if generated:
+            self.entries[key] = {
+                "translation": self.get_input_info(job.translation_plugin),
+                "original": self.get_input_info(job.original_plugin),
+                "compact": job.compact,
+            }
+        else:
+            self.entries.pop(key, None)
+
+            # Config of a previous version of the plugins
+            try:
+                os.remove(job.output_file)
+            except FileNotFoundError:
+                pass
+
+    def remove_stale(self, jobs: list[ConversionJob]) -> list[str]:
+        """
+        Deletes configs whose translation pair is not in `jobs` anymore
+        and returns their paths.
+
+        Configs of translations that were hidden after copying the config
+        to the translation patch are kept.
+        """
+
+        current_keys = {self.get_key(job) for job in jobs}
+        removed_files: list[str] = []
+
+        for key, entry in list(self.entries.items()):
+            if key in current_keys:
+                continue
+
+            if os.path.exists(entry["translation"]["path"] + ".mohidden"):
+                continue
+
+            output_file = self.output_mod_path / key
+            self.log.info(f"Removing outdated config {str(output_file)!r}...")
+
+            try:
+                os.remove(output_file)
+            except FileNotFoundError:
+                pass
+
+            # Remove plugin folder if it is empty now
+            try:
+                os.rmdir(output_file.parent)
+            except OSError:
+                pass
+
+            del self.entries[key]
+            removed_files.append(str(output_file))
+
+        return removed_files
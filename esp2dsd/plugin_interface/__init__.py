@@ -3,3 +3,4 @@ Copyright (c) Cutleast
 """
 
 from .plugin import Plugin
+from .scanner import StringScanner
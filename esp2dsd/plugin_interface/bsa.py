@@ -0,0 +1,442 @@
+"""
+Copyright (c) Cutleast
+"""
+
+import os
+import struct
+import zlib
+from pathlib import Path
+
+from .datatypes import Flags
+from .utilities import map_file
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+BSA_HEADER = struct.Struct("<4sIIIIIIIHH")
+"""
+Magic, version, offset of the folder records, archive flags, folder count,
+file count, total length of the folder names, total length of the file names,
+file flags and padding.
+"""
+
+FOLDER_RECORD_V104 = struct.Struct("<QII")
+"""
+Hash, file count and offset of the file records of a folder.
+"""
+
+FOLDER_RECORD_V105 = struct.Struct("<QIIQ")
+"""
+Hash, file count, padding and offset of the file records of a folder.
+"""
+
+FILE_RECORD = struct.Struct("<QII")
+"""
+Hash, size and offset of the data of a file.
+"""
+
+LENGTH_PREFIX = struct.Struct("<I")
+
+LZ4_FRAME_MAGIC = 0x184D2204
+
+SIZE_MASK = 0x3FFFFFFF
+COMPRESSION_TOGGLE = 0x40000000
+
+
+class ArchiveFlags(Flags):
+    """
+    Flags of a BSA archive.
+    """
+
+    IncludeDirectoryNames = 0x1
+    IncludeFileNames = 0x2
+    Compressed = 0x4
+    RetainDirectoryNames = 0x8
+    RetainFileNames = 0x10
+    RetainFileNameOffsets = 0x20
+    Xbox360 = 0x40
+    RetainStringsDuringStartup = 0x80
+    EmbedFileNames = 0x100
+    XMemCodec = 0x200
+
+
+def get_hash(name: str, is_folder: bool = False) -> int:
+    """
+    Returns the hash of a file or folder name in a BSA archive.
+    """
+
+    name = name.lower().replace("/", "\\")
+
+    if is_folder:
+        root, extension = name, ""
+    else:
+        root, extension = os.path.splitext(name)
+
+    chars = root.encode("cp1252", "replace")
+    extension_chars = extension.encode("cp1252", "replace")
+
+    hash1 = 0
+    if chars:
+        hash1 = chars[-1] | len(chars) << 16 | chars[0] << 24
+        if len(chars) > 2:
+            hash1 |= chars[-2] << 8
+
+    match extension:
+        case ".kf":
+            hash1 |= 0x80
+        case ".nif":
+            hash1 |= 0x8000
+        case ".dds":
+            hash1 |= 0x8080
+        case ".wav":
+            hash1 |= 0x80000000
+
+    hash2 = 0
+    for char in chars[1:-2]:
+        hash2 = (hash2 * 0x1003F + char) & 0xFFFFFFFF
+
+    hash3 = 0
+    for char in extension_chars:
+        hash3 = (hash3 * 0x1003F + char) & 0xFFFFFFFF
+
+    hash2 = (hash2 + hash3) & 0xFFFFFFFF
+
+    return (hash2 << 32) + hash1
+
+
+def decompress_lz4_block(data: bytes | memoryview, output: bytearray):
+    """
+    Decompresses an LZ4 block and appends it to `output`.
+
+    Matches may refer to data already in `output`, for eg. previous blocks
+    of the same frame.
+    """
+
+    position = 0
+    size = len(data)
+
+    while position < size:
+        token = data[position]
+        position += 1
+
+        literal_length = token >> 4
+        if literal_length == 15:
+            while True:
+                byte = data[position]
+                position += 1
+                literal_length += byte
+                if byte != 255:
+                    break
+
+        output += data[position : position + literal_length]
+        position += literal_length
+
+        # The last sequence of a block only has literals
+        if position >= size:
+            break
+
+        offset = data[position] | data[position + 1] << 8
+        position += 2
+
+        match_length = token & 15
+        if match_length == 15:
+            while True:
+                byte = data[position]
+                position += 1
+                match_length += byte
+                if byte != 255:
+                    break
+        match_length += 4
+
+        if offset == 0 or offset > len(output):
+            raise ValueError("Invalid LZ4 match offset!")
+
+        start = len(output) - offset
+        if match_length <= offset:
+            output += output[start : start + match_length]
+        else:
+            # Overlapping match that repeats the last `offset` bytes
+            pattern = output[start:]
+            output += (pattern * (match_length // offset + 1))[:match_length]
+
+
+def decompress_lz4_frame(data: bytes | memoryview) -> bytes:
+    """
+    Decompresses LZ4 frames without the `lz4` package,
+    which is not available in every Python environment.
+
+    Checksums are not verified.
+    """
+
+    view = memoryview(data)
+    output = bytearray()
+    position = 0
+
+    while position + 4 <= len(view):
+        magic = LENGTH_PREFIX.unpack_from(view, position)[0]
+        position += 4
+
+        # Skippable frames
+        if magic & 0xFFFFFFF0 == 0x184D2A50:
+            position += 4 + LENGTH_PREFIX.unpack_from(view, position)[0]
+            continue
+
+        if magic != LZ4_FRAME_MAGIC:
+            raise ValueError(f"Invalid LZ4 frame magic: {magic:#x}")
+
+        frame_flags = view[position]
+        position += 2
+        if frame_flags & 0x8:  # Content size
+            position += 8
+        if frame_flags & 0x1:  # Dictionary ID
+            position += 4
+        position += 1  # Header checksum
+
+        while True:
+            block_size = LENGTH_PREFIX.unpack_from(view, position)[0]
+            position += 4
+
+            if block_size == 0:
+                break
+
+            length = block_size & 0x7FFFFFFF
+            block = view[position : position + length]
+            position += length
+
+            # The highest bit marks uncompressed blocks
+            if block_size & 0x80000000:
+                output += block
+            else:
+                decompress_lz4_block(block, output)
+
+            if frame_flags & 0x10:  # Block checksum
+                position += 4
+
+        if frame_flags & 0x4:  # Content checksum
+            position += 4
+
+    return bytes(output)
+
+
+class BSAArchive:
+    """
+    Read-only BSA archive of Skyrim (version 104) or Skyrim Special Edition
+    (version 105).
+
+    The archive is memory mapped and nothing but its header is read when it is
+    opened. Folder and file records are sorted by their hashes, so a file is
+    found with a binary search of the folder records and then of the file
+    records of its folder, and only its data is read and decompressed.
+    """
+
+    path: Path
+    view: memoryview
+    version: int
+    flags: ArchiveFlags
+
+    VERSIONS = (104, 105)
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.view = map_file(path)
+
+        if len(self.view) < BSA_HEADER.size:
+            raise ValueError(f"{path.name!r} is not a BSA archive!")
+
+        (
+            magic,
+            self.version,
+            self.__folders_start,
+            flags,
+            self.folder_count,
+            self.file_count,
+            self.total_folder_name_length,
+            self.total_file_name_length,
+            _,
+            _,
+        ) = BSA_HEADER.unpack_from(self.view)
+
+        if magic != b"BSA\x00":
+            raise ValueError(f"{path.name!r} is not a BSA archive!")
+
+        if self.version not in self.VERSIONS:
+            raise ValueError(
+                f"Unsupported version {self.version} of BSA archive {path.name!r}!"
+            )
+
+        self.flags = ArchiveFlags(flags)
+        self.__folder_record = (
+            FOLDER_RECORD_V104 if self.version == 104 else FOLDER_RECORD_V105
+        )
+        self.__file_names: list[str] | None = None
+
+    def __find_record(
+        self, layout: struct.Struct, start: int, count: int, hash: int
+    ) -> tuple[int, tuple] | None:
+        """
+        Returns the index and values of the record with `hash` in the `count`
+        records at `start` or None if there is none.
+        """
+
+        low = 0
+        high = count
+
+        while low < high:
+            middle = (low + high) // 2
+            record = layout.unpack_from(self.view, start + middle * layout.size)
+
+            if record[0] < hash:
+                low = middle + 1
+            elif record[0] > hash:
+                high = middle
+            else:
+                return middle, record
+
+        return None
+
+    def get_folder(self, folder: str) -> tuple[int, int, int] | None:
+        """
+        Returns the index, file count and position of the file records
+        of `folder` or None if the archive does not contain it.
+        """
+
+        result = self.__find_record(
+            self.__folder_record,
+            self.__folders_start,
+            self.folder_count,
+            get_hash(folder, is_folder=True),
+        )
+
+        if result is None:
+            return None
+
+        index, record = result
+        count, offset = record[1], record[-1]
+
+        # Offsets of the file records include the length of the file names
+        position = offset - self.total_file_name_length
+        if ArchiveFlags.IncludeDirectoryNames in self.flags:
+            position += 1 + self.view[position]
+
+        return index, count, position
+
+    def get_file(self, path: str) -> tuple[int, int] | None:
+        """
+        Returns the size and offset of the file at `path`
+        or None if the archive does not contain it.
+        """
+
+        folder_name, _, name = path.replace("/", "\\").rpartition("\\")
+        folder = self.get_folder(folder_name)
+
+        if folder is None:
+            return None
+
+        _, count, position = folder
+        result = self.__find_record(FILE_RECORD, position, count, get_hash(name))
+
+        if result is None:
+            return None
+
+        return result[1][1], result[1][2]
+
+    def get_file_hashes(self, folder: str) -> list[int]:
+        """
+        Returns the hashes of the file names in `folder`.
+        """
+
+        result = self.get_folder(folder)
+
+        if result is None:
+            return []
+
+        _, count, position = result
+
+        return [
+            FILE_RECORD.unpack_from(self.view, position + index * FILE_RECORD.size)[0]
+            for index in range(count)
+        ]
+
+    def list_folder(self, folder: str) -> list[str] | None:
+        """
+        Returns the names of the files in `folder` or None if the archive
+        does not contain file names.
+        """
+
+        if ArchiveFlags.IncludeFileNames not in self.flags:
+            return None
+
+        result = self.get_folder(folder)
+
+        if result is None:
+            return []
+
+        index, count, _ = result
+
+        # File names are in the order of the file records of all folders
+        first_file = 0
+        for folder_index in range(index):
+            first_file += self.__folder_record.unpack_from(
+                self.view,
+                self.__folders_start + folder_index * self.__folder_record.size,
+            )[1]
+
+        if self.__file_names is None:
+            names_start = (
+                self.__folders_start
+                + self.folder_count * self.__folder_record.size
+                + self.file_count * FILE_RECORD.size
+            )
+            if ArchiveFlags.IncludeDirectoryNames in self.flags:
+                names_start += self.total_folder_name_length + self.folder_count
+
+            names = self.view[names_start : names_start + self.total_file_name_length]
+            self.__file_names = bytes(names).decode("cp1252", "replace").split("\x00")
+
+        return self.__file_names[first_file : first_file + count]
+
+    def __contains__(self, path: str) -> bool:
+        return self.get_file(path) is not None
+
+    def read(self, path: str) -> bytes | None:
+        """
+        Returns the decompressed data of the file at `path` in the archive
+        or None if the archive does not contain it.
+        """
+
+        file = self.get_file(path)
+
+        if file is None:
+            return None
+
+        size, offset = file
+
+        compressed = ArchiveFlags.Compressed in self.flags
+        if size & COMPRESSION_TOGGLE:
+            compressed = not compressed
+        size &= SIZE_MASK
+
+        if ArchiveFlags.EmbedFileNames in self.flags:
+            name_length = 1 + self.view[offset]
+            offset += name_length
+            size -= name_length
+
+        if not compressed:
+            return bytes(self.view[offset : offset + size])
+
+        original_size = LENGTH_PREFIX.unpack_from(self.view, offset)[0]
+        data = self.view[offset + LENGTH_PREFIX.size : offset + size]
+
+        if self.version == 104:
+            data = zlib.decompress(data)
+        elif lz4_frame is not None:
+            data = lz4_frame.decompress(data)
+        else:
+            data = decompress_lz4_frame(data)
+
+        if len(data) != original_size:
+            raise ValueError(f"Failed to decompress {path!r} in {self.path.name!r}!")
+
+        return data
@@ -7,7 +7,25 @@ import struct
 from enum import Enum, auto
 from io import BufferedReader
 
-from .utilities import get_stream, read_data
+from .utilities import get_stream, read_data, read_zstring
+
+
+RECORD_HEADER = struct.Struct("<4sIIIHHHH")
+"""
+Record header: type, size, flags, FormID, timestamp,
+version control info, internal version and unknown.
+"""
+
+GROUP_HEADER = struct.Struct("<4sI4siHHI")
+"""
+Group header: type, group size, label, group type, timestamp,
+version control info and unknown.
+"""
+
+SUBRECORD_HEADER = struct.Struct("<4sH")
+"""
+Subrecord header: type and size.
+"""
 
 
 class Integer:
@@ -127,7 +145,34 @@ class RawString(str):
         List = auto()
         """List of strings separated by `\\x00`."""
 
-    encoding: str
+    __slots__ = ()
+
+    encoding: str = "utf8"
+
+    __encoding_classes: dict[str, type["RawString"]] = {}
+
+    def __reduce__(self):
+        return (RawString.from_str, (str(self), self.encoding))
+
+    @staticmethod
+    def get_class(encoding: str) -> type["RawString"]:
+        """
+        Returns a subclass with `encoding` as class attribute, so that its
+        strings don't need an instance dictionary to store their encoding.
+        """
+
+        cls = RawString.__encoding_classes.get(encoding)
+
+        if cls is None:
+            name = f"RawString_{encoding}"
+            cls = type(
+                name,
+                (RawString,),
+                {"encoding": encoding, "__slots__": (), "__qualname__": name},
+            )
+            RawString.__encoding_classes[encoding] = cls
+
+        return cls
 
     @staticmethod
     def from_str(string: str, encoding: str):
@@ -135,49 +180,81 @@ class RawString(str):
         Converts `string` to a RawString object.
         """
 
-        raw = RawString(string)
-        raw.encoding = encoding
-
-        return raw
+        return RawString.get_class(encoding)(string)
 
     @staticmethod
-    def decode(data: bytes):
+    def decode(data: bytes, encoding: str | None = None):
         """
-        Tries to decode `data` using all supported encodings.
+        Decodes `data` with `encoding` if given and tries
+        all supported encodings if that fails.
         """
 
+        if encoding is not None:
+            try:
+                return RawString.get_class(encoding)(data.decode(encoding))
+            except UnicodeDecodeError:
+                pass
+
         for encoding in RawString.SUPPORTED_ENCODINGS:
             try:
-                string = RawString(data.decode(encoding))
-                string.encoding = encoding
-                return string
+                return RawString.get_class(encoding)(data.decode(encoding))
             except UnicodeDecodeError:
                 pass
         else:
-            string = RawString(data.decode(encoding, errors="replace"))
-            string.encoding = "utf8"  # Fallback to UTF-8 if encoding is unknown
-            return string
+            # Fallback to UTF-8 if encoding is unknown
+            return RawString.get_class("utf8")(
+                data.decode(encoding, errors="replace")
+            )
     
     @staticmethod
-    def encode(string: "RawString") -> bytes:
+    def set_encoding(string: "RawString", encoding: str):
+        """
+        Changes the encoding of `string` by changing its class,
+        since strings have no instance dictionary.
         """
-        Tries to encode `string` using all supported encodings.
+
+        if isinstance(string, RawString) and string.encoding != encoding:
+            string.__class__ = RawString.get_class(encoding)
+
+    @staticmethod
+    def encode(string: "RawString", encoding: str | None = None) -> bytes:
         """
+        Encodes `string` with `encoding` if given and tries
+        all supported encodings if that fails.
+        """
+
+        if encoding is not None:
+            try:
+                data = str(string).encode(encoding)
+                RawString.set_encoding(string, encoding)
+                return data
+            except UnicodeEncodeError:
+                pass
 
         for encoding in RawString.SUPPORTED_ENCODINGS:
             try:
                 data = str(string).encode(encoding)
-                string.encoding = encoding
+                RawString.set_encoding(string, encoding)
                 return data
             except UnicodeEncodeError:
                 pass
         else:
             data = str(string).encode("utf8", errors="replace")
-            string.encoding = "utf8"  # Fallback to UTF-8 if encoding is unknown
+            # Fallback to UTF-8 if encoding is unknown
+            RawString.set_encoding(string, "utf8")
             return data
 
     @staticmethod
-    def parse(data: BufferedReader | bytes, type: StrType, size: int = None):
+    def parse(
+        data: BufferedReader | bytes | memoryview,
+        type: StrType,
+        size: int = None,
+        encoding: str | None = None,
+    ):
+        # Strings are decoded anyway, so materialize views of shared buffers once
+        if isinstance(data, memoryview):
+            data = bytes(data)
+
         stream = get_stream(data)
 
         match type:
@@ -190,68 +267,92 @@ class RawString(str):
             case type.BZString | type.BString:
                 size = Integer.parse(stream, Integer.IntType.UInt8)
                 data = read_data(stream, size).strip(b"\x00")
-                return RawString.decode(data)
+                return RawString.decode(data, encoding)
 
             case type.WString | type.WZString:
                 size = Integer.parse(stream, Integer.IntType.Int16)
                 data = read_data(stream, size).strip(b"\x00")
-                return RawString.decode(data)
+                return RawString.decode(data, encoding)
 
             case type.ZString:
-                data = b""
-                while (char := stream.read(1)) != b"\x00" and char:
-                    data += char
+                if isinstance(data, bytes):
+                    end = data.find(b"\x00")
+                    return RawString.decode(
+                        data if end == -1 else data[:end], encoding
+                    )
 
-                return RawString.decode(data)
+                return RawString.decode(read_zstring(stream) or b"", encoding)
 
             case type.String:
                 data = read_data(stream, size)
-                return RawString.decode(data)
+                return RawString.decode(data, encoding)
 
             case type.List:
                 strings: list[RawString] = []
 
+                if isinstance(data, bytes):
+                    pos = 0
+
+                    while len(strings) < size and pos < len(data):
+                        end = data.find(b"\x00", pos)
+                        if end == -1:
+                            end = len(data)
+
+                        if end > pos:
+                            strings.append(RawString.decode(data[pos:end], encoding))
+
+                        pos = end + 1
+
+                    return strings
+
                 while len(strings) < size:
-                    string = b""
-                    while (char := stream.read(1)) != b"\x00" and char:
-                        string += char
+                    string = read_zstring(stream)
+
+                    # Data ends before the expected number of strings
+                    if string is None:
+                        break
 
                     if string:
-                        strings.append(RawString.decode(string))
+                        strings.append(RawString.decode(string, encoding))
 
                 return strings
 
     @staticmethod
-    def dump(value: "list[RawString]|RawString", type: StrType) -> bytes:
+    def dump(
+        value: "list[RawString]|RawString", type: StrType, encoding: str | None = None
+    ) -> bytes:
         match type:
             case type.Char | type.WChar | type.String:
-                return RawString.encode(value)
+                return RawString.encode(value, encoding)
 
             case type.BString:
-                text = RawString.encode(value)
+                text = RawString.encode(value, encoding)
                 size = Integer.dump(len(text), Integer.IntType.UInt8)
                 return size + text
 
             case type.BZString:
-                text = RawString.encode(value) + b"\x00"
+                text = RawString.encode(value, encoding) + b"\x00"
                 size = Integer.dump(len(text), Integer.IntType.UInt8)
                 return size + text
 
             case type.WString:
-                text = RawString.encode(value)
+                text = RawString.encode(value, encoding)
                 size = Integer.dump(len(text), Integer.IntType.UInt16)
                 return size + text
 
             case type.WZString:
-                text = RawString.encode(value) + b"\x00"
+                text = RawString.encode(value, encoding) + b"\x00"
                 size = Integer.dump(len(text), Integer.IntType.UInt16)
                 return size + text
 
             case type.ZString:
-                return RawString.encode(value) + b"\x00"
+                return RawString.encode(value, encoding) + b"\x00"
 
             case type.List:
-                data = b"\x00".join(RawString.encode(v) for v in value) + b"\x00"
+                data = (
+                    b"\x00".join(RawString.encode(v, encoding) for v in value)
+                    + b"\x00"
+                )
 
                 return data
 
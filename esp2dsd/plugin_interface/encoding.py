@@ -0,0 +1,124 @@
+"""
+Copyright (c) Cutleast
+"""
+
+import zlib
+from typing import Iterator
+
+from .datatypes import GROUP_HEADER, RECORD_HEADER, SUBRECORD_HEADER, RawString
+from .flags import RecordFlags
+from .utilities import STRING_RECORDS
+
+
+def sample_strings(data: bytes | memoryview, max_samples: int = 256) -> list[bytes]:
+    """
+    Returns up to `max_samples` non-ASCII strings from the string subrecords
+    of the plugin in `data`, in the order they appear in the plugin.
+    """
+
+    samples: list[bytes] = []
+
+    size, flags = RECORD_HEADER.unpack_from(data, 0)[1:3]
+
+    # Strings of localized plugins are in separate string tables
+    if RecordFlags.Localized in RecordFlags(flags):
+        return samples
+
+    pos = RECORD_HEADER.size + size
+
+    while pos < len(data) and len(samples) < max_samples:
+        record_type, size, flags = RECORD_HEADER.unpack_from(data, pos)[:3]
+
+        # Enter groups by skipping their header
+        if record_type == b"GRUP":
+            pos += GROUP_HEADER.size
+            continue
+
+        record_data = data[pos + RECORD_HEADER.size : pos + RECORD_HEADER.size + size]
+        pos += RECORD_HEADER.size + size
+
+        string_types = STRING_RECORDS.get(record_type.decode(errors="replace"))
+        if not string_types:
+            continue
+
+        if RecordFlags.Compressed in RecordFlags(flags):
+            record_data = zlib.decompress(record_data[4:])
+
+        for string in iter_subrecord_strings(record_data, string_types):
+            if not string.isascii():
+                samples.append(string)
+
+    return samples[:max_samples]
+
+
+def iter_subrecord_strings(
+    data: bytes | memoryview, string_types: list[str]
+) -> Iterator[bytes]:
+    """
+    Yields the null-terminated strings of subrecords whose type is in `string_types`.
+    """
+
+    pos = 0
+    field_size = None
+
+    while pos + SUBRECORD_HEADER.size <= len(data):
+        subrecord_type, size = SUBRECORD_HEADER.unpack_from(data, pos)
+        pos += SUBRECORD_HEADER.size
+
+        # Size of a subrecord following XXXX is stored in the XXXX subrecord
+        if field_size is not None:
+            size, field_size = field_size, None
+
+        subrecord_data = bytes(data[pos : pos + size])
+        pos += size
+
+        if subrecord_type == b"XXXX":
+            field_size = int.from_bytes(subrecord_data, "little")
+
+        elif subrecord_type.decode(errors="replace") in string_types:
+            yield subrecord_data.split(b"\x00", 1)[0]
+
+
+def detect_encoding(samples: list[bytes]) -> str:
+    """
+    Returns the encoding of a plugin with the strings in `samples`.
+
+    Encodings are checked in the order of `RawString.SUPPORTED_ENCODINGS`,
+    like `RawString.decode()` does for single strings. UTF-8 is chosen if any
+    sample is valid UTF-8 since legacy encoded text is practically never
+    valid UTF-8. Otherwise the first encoding that decodes most samples wins.
+    """
+
+    encodings = RawString.SUPPORTED_ENCODINGS
+    best_encoding = encodings[0]
+    best_count = 0
+
+    for encoding in encodings:
+        count = 0
+
+        for sample in samples:
+            try:
+                sample.decode(encoding)
+                count += 1
+            except UnicodeDecodeError:
+                pass
+
+        if encoding == "utf8" and count:
+            return encoding
+
+        if count > best_count:
+            best_encoding = encoding
+            best_count = count
+
+            if count == len(samples):
+                break
+
+    return best_encoding
+
+
+def detect_plugin_encoding(data: bytes | memoryview) -> str:
+    """
+    Detects the encoding of the strings in the plugin in `data`.
+    """
+
+    return detect_encoding(sample_strings(data))
@@ -5,10 +5,19 @@ Copyright (c) Cutleast
 import logging
 from enum import IntEnum
 from io import BufferedReader, BytesIO
+from typing import BinaryIO
 
-from .datatypes import Flags, Hex, Integer
+from .datatypes import GROUP_HEADER, Flags, Hex, Integer
 from .record import Record
-from .utilities import peek, prettyprint_object
+from .utilities import (
+    BufferStream,
+    get_state,
+    get_stream,
+    peek,
+    prettyprint_object,
+    read_struct,
+    set_state,
+)
 
 log = logging.getLogger("PluginParser.Group")
 
@@ -25,10 +34,26 @@ class Group:
     timestamp: int
     version_control_info: int
     unknown: int
-    data: bytes
+    data: bytes | memoryview | None
 
     children: list
 
+    __slots__ = (
+        "type",
+        "group_size",
+        "label",
+        "group_type",
+        "timestamp",
+        "version_control_info",
+        "unknown",
+        "data",
+        "children",
+        "grid",
+        "block_number",
+        "subblock_number",
+        "parent_cell",
+    )
+
     class GroupType(IntEnum):
         """
         Group types. See https://en.uesp.net/wiki/Skyrim_Mod:Mod_File_Format#Groups for more.
@@ -49,35 +74,57 @@ class Group:
         return prettyprint_object(self)
 
     def __len__(self):
-        return len(self.dump())
+        return GROUP_HEADER.size + sum(len(child) for child in self.children)
+
+    def __getstate__(self) -> dict:
+        return get_state(self)
+
+    def __setstate__(self, state: dict):
+        set_state(self, state)
+
+    def parse(
+        self,
+        stream: BufferedReader,
+        header_flags: Flags,
+        discard_data: bool = False,
+        encoding: str | None = None,
+    ):
+        """
+        If `discard_data` is True, the group data and the data of its records
+        is dropped once the records are parsed.
+
+        Strings of the records are decoded with `encoding` if given.
+        """
 
-    def parse(self, stream: BufferedReader, header_flags: Flags):
-        self.type = stream.read(4).decode()
-        self.group_size = Integer.parse(stream, Integer.IntType.UInt32)
-        label = stream.read(4)
-        self.group_type = Integer.parse(stream, Integer.IntType.Int32)
-        self.timestamp = Integer.parse(stream, Integer.IntType.UInt16)
-        self.version_control_info = Integer.parse(stream, Integer.IntType.UInt16)
-        self.unknown = Integer.parse(stream, Integer.IntType.UInt32)
+        (
+            record_type,
+            self.group_size,
+            label,
+            self.group_type,
+            self.timestamp,
+            self.version_control_info,
+            self.unknown,
+        ) = read_struct(stream, GROUP_HEADER)
+        self.type = record_type.decode()
 
         self.data = stream.read(self.group_size - 24)
-        record_stream = BytesIO(self.data)
+        record_stream = get_stream(self.data)
 
         match self.group_type:
             # Normal groups
             case Group.GroupType.Normal:
                 self.label = label.decode()
-                self.parse_records(record_stream, header_flags)
+                self.parse_records(record_stream, header_flags, discard_data, encoding)
 
             # Dialogue Groups
             case Group.GroupType.TopicChildren:
                 self.label = Hex.parse(label)
-                self.parse_records(record_stream, header_flags)
+                self.parse_records(record_stream, header_flags, discard_data, encoding)
 
             # Worldspace Group
             case Group.GroupType.WorldChildren:
                 self.label = Hex.parse(label)
-                self.parse_records(record_stream, header_flags)
+                self.parse_records(record_stream, header_flags, discard_data, encoding)
 
             # Exterior Cells
             case Group.GroupType.ExteriorCellBlock:
@@ -86,7 +133,7 @@ class Group:
                     Integer.parse(label_stream, Integer.IntType.Int16),  # Y
                     Integer.parse(label_stream, Integer.IntType.Int16),  # X
                 )
-                self.parse_records(record_stream, header_flags)
+                self.parse_records(record_stream, header_flags, discard_data, encoding)
 
             case Group.GroupType.ExteriorCellSubBlock:
                 label_stream = BytesIO(label)
@@ -94,16 +141,16 @@ class Group:
                     Integer.parse(label_stream, Integer.IntType.Int16),  # Y
                     Integer.parse(label_stream, Integer.IntType.Int16),  # X
                 )
-                self.parse_records(record_stream, header_flags)
+                self.parse_records(record_stream, header_flags, discard_data, encoding)
 
             # Interior Cells
             case Group.GroupType.InteriorCellBlock:
                 self.block_number = Integer.parse(label, Integer.IntType.Int32)
-                self.parse_records(record_stream, header_flags)
+                self.parse_records(record_stream, header_flags, discard_data, encoding)
 
             case Group.GroupType.InteriorCellSubBlock:
                 self.subblock_number = Integer.parse(label, Integer.IntType.Int32)
-                self.parse_records(record_stream, header_flags)
+                self.parse_records(record_stream, header_flags, discard_data, encoding)
 
             # Cell Children
             case (
@@ -112,14 +159,23 @@ class Group:
                 | Group.GroupType.CellTemporaryChildren
             ):
                 self.parent_cell = Hex.parse(label)
-                self.parse_records(record_stream, header_flags)
+                self.parse_records(record_stream, header_flags, discard_data, encoding)
 
             # Unknown
             case self.unknown:
                 log.warning(f"Unknown Group Type: {self.group_type}")
                 raise Exception(f"Unknown Group Type: {self.group_type}")
 
-    def parse_records(self, stream: BytesIO, header_flags: Flags):
+        if discard_data:
+            self.data = None
+
+    def parse_records(
+        self,
+        stream: BytesIO | BufferStream,
+        header_flags: Flags,
+        discard_data: bool = False,
+        encoding: str | None = None,
+    ):
         self.children = []
 
         while child_type := peek(stream, 4):
@@ -130,27 +186,16 @@ class Group:
             else:
                 child = Record()
 
-            child.parse(stream, header_flags)
+            child.parse(stream, header_flags, discard_data, encoding)
             self.children.append(child)
 
-    def dump(self) -> bytes:
-        data = b""
-
-        child_data = b"".join(child.dump() for child in self.children)
-        self.group_size = (
-            len(child_data) + 24
-        )  # Size of subgroups and records including Group Header
-
-        data += self.type.encode()
-        data += Integer.dump(self.group_size, Integer.IntType.UInt32)
-
+    def get_label_data(self) -> bytes:
         match self.group_type:
             case Group.GroupType.Normal:
-                data += self.label.encode()
+                return self.label.encode()
 
             case Group.GroupType.WorldChildren | Group.GroupType.TopicChildren:
-                # print(self.group_type)
-                data += Hex.dump(self.label)
+                return Hex.dump(self.label)
 
             # Cell Children
             case (
@@ -158,24 +203,66 @@ class Group:
                 | Group.GroupType.CellPersistentChildren
                 | Group.GroupType.CellTemporaryChildren
             ):
-                data += Hex.dump(self.parent_cell)
+                return Hex.dump(self.parent_cell)
 
             case (
                 Group.GroupType.ExteriorCellBlock | Group.GroupType.ExteriorCellSubBlock
             ):
-                data += Integer.dump(self.grid[0], Integer.IntType.Int16)  # Y
-                data += Integer.dump(self.grid[1], Integer.IntType.Int16)  # X
+                return Integer.dump(self.grid[0], Integer.IntType.Int16) + Integer.dump(
+                    self.grid[1], Integer.IntType.Int16
+                )  # Y, X
 
             case Group.GroupType.InteriorCellBlock:
-                data += Integer.dump(self.block_number, Integer.IntType.Int32)
+                return Integer.dump(self.block_number, Integer.IntType.Int32)
 
             case Group.GroupType.InteriorCellSubBlock:
-                data += Integer.dump(self.subblock_number, Integer.IntType.Int32)
+                return Integer.dump(self.subblock_number, Integer.IntType.Int32)
+
+    def get_header(self) -> bytes:
+        return GROUP_HEADER.pack(
+            self.type.encode(),
+            self.group_size,
+            self.get_label_data(),
+            self.group_type,
+            self.timestamp,
+            self.version_control_info,
+            self.unknown,
+        )
+
+    def write(self, stream: BinaryIO) -> int:
+        """
+        Writes the group to `stream` and returns the number of written bytes.
+
+        The group size in the header is fixed up once the children are written
+        if `stream` is seekable, and computed beforehand otherwise.
+        """
+
+        if not stream.seekable():
+            self.group_size = len(self)
+            stream.write(self.get_header())
+
+            for child in self.children:
+                child.write(stream)
+
+            return self.group_size
 
-        data += Integer.dump(self.group_type, Integer.IntType.Int32)
-        data += Integer.dump(self.timestamp, Integer.IntType.UInt16)
-        data += Integer.dump(self.version_control_info, Integer.IntType.UInt16)
-        data += Integer.dump(self.unknown, Integer.IntType.UInt32)
-        data += child_data
+        header_pos = stream.tell()
+        stream.write(bytes(GROUP_HEADER.size))
+
+        # Size of subgroups and records including Group Header
+        self.group_size = GROUP_HEADER.size + sum(
+            child.write(stream) for child in self.children
+        )
+
+        end_pos = stream.tell()
+        stream.seek(header_pos)
+        stream.write(self.get_header())
+        stream.seek(end_pos)
+
+        return self.group_size
+
+    def dump(self) -> bytes:
+        stream = BytesIO()
+        self.write(stream)
 
-        return data
+        return stream.getvalue()
@@ -3,17 +3,26 @@ Copyright (c) Cutleast
 """
 
 import logging
-from io import BufferedReader
+import os
+from io import BufferedReader, BytesIO
 from pathlib import Path
+from typing import BinaryIO
 
 from . import utilities as utils
 from .datatypes import RawString
+from .encoding import detect_plugin_encoding
 from .flags import RecordFlags
 from .group import Group
 from .plugin_string import PluginString
 from .record import Record
+from .string_table import StringTables
 from .subrecord import EDID, MAST, StringSubrecord
 
+StringKey = tuple[str, str, int | None, str]
+"""
+FormID without master index, type, index and original string of a string subrecord.
+"""
+
 
 class Plugin:
     """
@@ -21,16 +30,57 @@ class Plugin:
     """
 
     path: Path
+    use_mmap: bool
+    discard_data: bool
+    per_string_encoding: bool
+
+    encoding: str | None
+    """
+    Encoding of the strings in the plugin, detected from a sample of them.
+    None if the encoding is detected for each string.
+    """
 
     header: Record
     groups: list[Group]
 
-    __string_subrecords: dict[PluginString, StringSubrecord] = None
+    string_tables: StringTables | None
+    """
+    String tables of the plugin if it is localized.
+    """
+
+    __string_index: dict[StringKey, StringSubrecord] | None = None
+    """
+    String subrecords by their keys. Built on the first lookup and dropped
+    when the plugin is parsed again or its strings are replaced.
+    """
 
     log = logging.getLogger("PluginInterface")
 
-    def __init__(self, path: Path):
+    def __init__(
+        self,
+        path: Path,
+        use_mmap: bool = False,
+        discard_data: bool = False,
+        per_string_encoding: bool = False,
+    ):
+        """
+        If `use_mmap` is True, the plugin file is memory mapped and groups,
+        records and subrecords hold views into the mapping instead of copies
+        of their data. The mapping stays open as long as they are alive.
+
+        If `discard_data` is True, the raw data of groups and records is
+        dropped once their children are parsed to save memory.
+
+        If `per_string_encoding` is True, every string is decoded by trying
+        all supported encodings instead of using the plugin's `encoding`.
+        """
+
         self.path = path
+        self.use_mmap = use_mmap
+        self.discard_data = discard_data
+        self.per_string_encoding = per_string_encoding
+        self.encoding = None
+        self.string_tables = None
 
         self.load()
 
@@ -38,42 +88,97 @@ class Plugin:
         return utils.prettyprint_object(self)
 
     def __len__(self):
-        return len(self.dump())
+        return len(self.header) + sum(len(group) for group in self.groups)
 
     def __str__(self) -> str:
         return self.__repr__()
 
     def load(self):
-        with self.path.open("rb") as stream:
-            self.parse(stream)
+        if self.use_mmap:
+            view = utils.map_file(self.path)
+
+            if not self.per_string_encoding:
+                self.detect_encoding(view)
+
+            self.parse(utils.BufferStream(view))
+        else:
+            if not self.per_string_encoding:
+                # Only mapped while sampling, the plugin is read from a stream
+                with utils.mapped_file(self.path) as view:
+                    self.detect_encoding(view)
+
+            with self.path.open("rb") as stream:
+                self.parse(stream)
+
+        if RecordFlags.Localized in self.header.flags:
+            self.string_tables = StringTables.find(self.path)
 
-    def parse(self, stream: BufferedReader):
+            if self.string_tables is None:
+                self.log.warning(
+                    f"No string tables found for localized plugin {self.path.name!r}."
+                )
+
+    def detect_encoding(self, data: memoryview):
+        self.encoding = detect_plugin_encoding(data)
+        self.log.debug(f"Detected encoding of {self.path.name!r}: {self.encoding}")
+
+    def parse(self, stream: BufferedReader | utils.BufferStream):
         self.log.info(f"Parsing {str(self.path)!r}...")
 
         self.groups = []
+        self.__string_index = None
 
         self.header = Record()
-        self.header.parse(stream, [])
+        self.header.parse(stream, [], encoding=self.encoding)
 
         while utils.peek(stream, 1):
             group = Group()
-            group.parse(stream, self.header.flags)
+            group.parse(stream, self.header.flags, self.discard_data, self.encoding)
             self.groups.append(group)
 
         self.log.info("Parsing complete.")
 
-    def dump(self):
-        data = b""
+    def dump(self) -> bytes:
+        stream = BytesIO()
+        self.save(stream)
 
-        data += self.header.dump()
+        return stream.getvalue()
 
-        for group in self.groups:
-            data += group.dump()
+    def save(self, stream: BinaryIO | None = None):
+        """
+        Writes the plugin to `stream` or to its file if no stream is given.
+
+        Records that were not parsed are copied as they were read.
+        """
+
+        if stream is not None:
+            self.header.write(stream)
+
+            for group in self.groups:
+                group.write(stream)
 
-        return data
+            return
 
-    def save(self):
-        self.path.write_bytes(self.dump())
+        # Replace the file instead of overwriting the one that is still read
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        with temp_path.open("wb") as file:
+            self.save(file)
+
+        if not self.use_mmap:
+            os.replace(temp_path, self.path)
+            return
+
+        # Memory mapped files cannot be replaced on Windows, so the views
+        # into the mapping are released first and the plugin is parsed again
+        # from the new file
+        self.header = Record()
+        self.groups = []
+        self.__string_index = None
+
+        try:
+            os.replace(temp_path, self.path)
+        finally:
+            self.load()
 
     @staticmethod
     def get_record_edid(record: Record):
@@ -84,6 +189,13 @@ class Plugin:
         except AttributeError:
             return None
 
+    def get_masters(self) -> list[str]:
+        return [
+            subrecord.file
+            for subrecord in self.header.subrecords
+            if isinstance(subrecord, MAST)
+        ]
+
     def extract_group_strings(
         self, group: Group, extract_localized: bool = False, unfiltered: bool = False
     ):
@@ -93,58 +205,97 @@ class Plugin:
 
         strings: dict[PluginString, StringSubrecord] = {}
 
-        masters = [
-            subrecord.file
-            for subrecord in self.header.subrecords
-            if isinstance(subrecord, MAST)
-        ]
+        masters = self.get_masters()
+        is_light = self.path.suffix.lower() == ".esl" or (
+            RecordFlags.LightMaster in self.header.flags
+        )
 
         record: Record | Group
         for record in group.children:
             if isinstance(record, Group):
-                strings |= self.extract_group_strings(record, extract_localized)
-            else:
-                edid = self.get_record_edid(record)
-                master_index = int(record.formid[:2], base=16)
-
-                # Get plugin that first defines this record from masters
-                try:
-                    master = masters[master_index]
-                # If index is not in masters, then the record is first defined in this plugin
-                except IndexError:
-                    master = self.path.name
-
-                formid = f"{record.formid}|{master}"
-
-                # Replace Master Index by "FE" Prefix to indicate Light Plugin
-                # This is especially relevant for DSD
-                if (
-                    self.path.suffix.lower() == ".esl"
-                    or RecordFlags.LightMaster in self.header.flags
-                ) and master == self.path.name:
-                    formid = "FE" + formid[2:]
-
-                for subrecord in record.subrecords:
-                    if isinstance(subrecord, StringSubrecord):
-                        string: RawString | int = subrecord.string
-
-                        if (isinstance(string, RawString) or extract_localized) and (
-                            utils.is_valid_string(string) or unfiltered
-                        ):
-                            string_data = PluginString(
-                                edid,
-                                formid,
-                                subrecord.index,
-                                f"{record.type} {subrecord.type}",
-                                original_string=str(string),
-                                status=(
-                                    PluginString.Status.TranslationRequired
-                                    if utils.is_valid_string(string)
-                                    else PluginString.Status.NoTranslationRequired
-                                ),
-                            )
-
-                            strings[string_data] = subrecord
+                strings |= self.extract_group_strings(
+                    record, extract_localized, unfiltered
+                )
+            # Don't decompress and parse records that cannot contain strings
+            elif record.type in utils.STRING_RECORDS:
+                for string_data, subrecord in self.extract_record_strings(
+                    record,
+                    self.path.name,
+                    masters,
+                    is_light,
+                    extract_localized,
+                    unfiltered,
+                    self.string_tables,
+                ):
+                    strings[string_data] = subrecord
+
+        return strings
+
+    @staticmethod
+    def extract_record_strings(
+        record: Record,
+        plugin_name: str,
+        masters: list[str],
+        is_light: bool,
+        extract_localized: bool = False,
+        unfiltered: bool = False,
+        string_tables: StringTables | None = None,
+    ) -> list[tuple[PluginString, StringSubrecord]]:
+        """
+        Extracts strings from parsed <record>.
+
+        String IDs of localized plugins are resolved with `string_tables` if given.
+        """
+
+        strings: list[tuple[PluginString, StringSubrecord]] = []
+
+        edid = Plugin.get_record_edid(record)
+        master_index = int(record.formid[:2], base=16)
+
+        # Get plugin that first defines this record from masters
+        try:
+            master = masters[master_index]
+        # If index is not in masters, then the record is first defined in this plugin
+        except IndexError:
+            master = plugin_name
+
+        formid = f"{record.formid}|{master}"
+
+        # Replace Master Index by "FE" Prefix to indicate Light Plugin
+        # This is especially relevant for DSD
+        if is_light and master == plugin_name:
+            formid = "FE" + formid[2:]
+
+        for subrecord in record.subrecords:
+            if isinstance(subrecord, StringSubrecord):
+                string: RawString | int = subrecord.string
+
+                if isinstance(string, int) and string_tables is not None:
+                    localized_string = string_tables.get(string)
+
+                    if localized_string is not None:
+                        string = localized_string
+
+                if not (isinstance(string, RawString) or extract_localized):
+                    continue
+
+                is_valid = utils.is_valid_string(string)
+
+                if is_valid or unfiltered:
+                    string_data = PluginString(
+                        edid,
+                        formid,
+                        subrecord.index,
+                        f"{record.type} {subrecord.type}",
+                        original_string=str(string),
+                        status=(
+                            PluginString.Status.TranslationRequired
+                            if is_valid
+                            else PluginString.Status.NoTranslationRequired
+                        ),
+                    )
+
+                    strings.append((string_data, subrecord))
 
         return strings
 
@@ -167,6 +318,39 @@ class Plugin:
 
         return strings
 
+    @staticmethod
+    def get_string_key(
+        form_id: str, type: str, string: str, index: int | None
+    ) -> StringKey:
+        # Ignore master index and FE prefix
+        return (form_id[2:], type, index, string)
+
+    def build_string_index(self) -> dict[StringKey, StringSubrecord]:
+        """
+        Maps the keys of all strings in the plugin to their subrecords.
+        """
+
+        string_index: dict[StringKey, StringSubrecord] = {}
+
+        for group in self.groups:
+            for plugin_string, subrecord in self.extract_group_strings(group).items():
+                # Localized strings are in the string tables, not in the plugin
+                if isinstance(subrecord.string, int):
+                    continue
+
+                # Keep the first match like a search through the strings would
+                string_index.setdefault(
+                    self.get_string_key(
+                        plugin_string.form_id,
+                        plugin_string.type,
+                        plugin_string.original_string,
+                        plugin_string.index,
+                    ),
+                    subrecord,
+                )
+
+        return string_index
+
     def find_string_subrecord(
         self, form_id: str, type: str, string: str, index: int | None
     ) -> StringSubrecord | None:
@@ -174,24 +358,12 @@ class Plugin:
         Finds subrecord that matches the given parameters.
         """
 
-        if self.__string_subrecords is None:
-            string_subrecords: dict[PluginString, StringSubrecord] = {}
-
-            for group in self.groups:
-                current_group = self.extract_group_strings(group)
-                string_subrecords |= current_group
+        if self.__string_index is None:
+            self.__string_index = self.build_string_index()
 
-            self.__string_subrecords = string_subrecords
-
-        for plugin_string, subrecord in self.__string_subrecords.items():
-            if (
-                plugin_string.form_id[2:]
-                == form_id[2:]  # Ignore master index and FE prefix
-                and plugin_string.type == type
-                and plugin_string.original_string == string
-                and plugin_string.index == index
-            ):
-                return subrecord
+        return self.__string_index.get(
+            self.get_string_key(form_id, type, string, index)
+        )
 
     def replace_strings(self, strings: list[PluginString]):
         """
@@ -210,6 +382,9 @@ class Plugin:
                     f"Failed to replace string {string}: Subrecord not found!"
                 )
 
+        # The replaced subrecords no longer match their keys
+        self.__string_index = None
+
     @staticmethod
     def is_light(plugin_path: Path):
         """
@@ -4,11 +4,11 @@ by Cutleast and falls under the license
 Attribution-NonCommercial-NoDerivatives 4.0 International.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum, auto
 
 
-@dataclass
+@dataclass(slots=True)
 class PluginString:
     """
     Class for translation strings.
@@ -94,7 +94,7 @@ class PluginString:
     Status visible in Editor Tab.
     """
 
-    tree_item = None
+    tree_item: object = field(default=None, repr=False)
     """
     Tree Item in Editor Tab.
     """
@@ -177,16 +177,18 @@ class PluginString:
         )
 
     def __getstate__(self):
-        state = self.__dict__.copy()
-
         # Don't pickle tree_item
-        if self.tree_item:
-            del state["tree_item"]
+        state = {
+            name: getattr(self, name)
+            for name in self.__slots__
+            if name != "tree_item"
+        }
 
         return state
 
     def __setstate__(self, state):
-        self.__dict__.update(state)
+        for name, value in state.items():
+            setattr(self, name, value)
 
         # Add tree_item back
         self.tree_item = None
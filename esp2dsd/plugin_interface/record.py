@@ -2,14 +2,44 @@
 Copyright (c) Cutleast
 """
 
+import hashlib
 import logging
 import zlib
+from enum import Enum
 from io import BufferedReader, BytesIO
+from typing import BinaryIO
 
-from .datatypes import Hex, Integer
+from .datatypes import RECORD_HEADER, Integer
 from .flags import RecordFlags
 from .subrecord import SUBRECORD_MAP, StringSubrecord, Subrecord
-from .utilities import STRING_RECORDS, get_checksum, peek, prettyprint_object
+from .utilities import (
+    STRING_RECORDS,
+    get_checksum,
+    get_state,
+    get_stream,
+    peek,
+    prettyprint_object,
+    read_struct,
+    set_state,
+)
+
+
+class IndexScheme(Enum):
+    """
+    Schemes for deriving the indices of QUST strings from subrecord data.
+    """
+
+    Blake2 = "blake2b"
+    """
+    64-bit BLAKE2b digest of the subrecord data,
+    stable across processes and runs.
+    """
+
+    Hash = "hash"
+    """
+    Python's `hash()` of the subrecord data, like previous versions.
+    It is randomized per process unless `PYTHONHASHSEED` is set.
+    """
 
 
 class Record:
@@ -25,35 +55,173 @@ class Record:
     version_control_info: int
     internal_version: int
     unknown: int
-    data: bytes
+    raw_data: bytes | memoryview | None
+    """
+    Record data as stored in the plugin file (compressed if the record is).
+    """
+
+    header_flags: RecordFlags
+    encoding: str | None
+    """
+    Encoding of the strings in the plugin,
+    None to detect the encoding of each string.
+    """
 
-    subrecords: list[Subrecord]
+    discard_data: bool
+    """
+    Whether to drop the record data once the subrecords are parsed.
+    """
+
+    _data: bytes | memoryview | None
+    _subrecords: list[Subrecord] | None
+
+    __slots__ = (
+        "type",
+        "size",
+        "flags",
+        "formid",
+        "timestamp",
+        "version_control_info",
+        "internal_version",
+        "unknown",
+        "raw_data",
+        "header_flags",
+        "encoding",
+        "discard_data",
+        "_data",
+        "_subrecords",
+    )
+
+    index_scheme: IndexScheme = IndexScheme.Blake2
+    """
+    Scheme for the indices of QUST log entries and stages.
+    """
 
     log = logging.getLogger("PluginParser")
 
+    def __init__(self):
+        self.raw_data = None
+        self.encoding = None
+        self.discard_data = False
+        self._data = None
+        self._subrecords = None
+
     def __repr__(self) -> str:
         return prettyprint_object(self)
 
+    def __getstate__(self) -> dict:
+        return get_state(self)
+
+    def __setstate__(self, state: dict):
+        set_state(self, state)
+
     def __len__(self):
-        return len(self.dump())
-
-    def parse(self, stream: BufferedReader, header_flags: RecordFlags):
-        self.type = stream.read(4).decode()
-        self.size = Integer.parse(stream, Integer.IntType.UInt32)
-        self.flags = RecordFlags.parse(stream, Integer.IntType.UInt32)
-        self.formid = Hex.parse(stream)
-        self.timestamp = Integer.parse(stream, Integer.IntType.UInt16)
-        self.version_control_info = Integer.parse(stream, Integer.IntType.UInt16)
-        self.internal_version = Integer.parse(stream, Integer.IntType.UInt16)
-        self.unknown = Integer.parse(stream, Integer.IntType.UInt16)
-
-        # Decompress data if compressed
+        if self._subrecords is None:
+            return RECORD_HEADER.size + len(self.raw_data)
+
+        # Compressed size is only known after compressing
+        if RecordFlags.Compressed in self.flags:
+            return RECORD_HEADER.size + len(self.get_raw_data())
+
+        return RECORD_HEADER.size + sum(
+            len(subrecord.dump(self.encoding)) for subrecord in self._subrecords
+        )
+
+    def parse(
+        self,
+        stream: BufferedReader,
+        header_flags: RecordFlags,
+        discard_data: bool = False,
+        encoding: str | None = None,
+    ):
+        """
+        If `discard_data` is True, the record data is dropped once
+        the subrecords are parsed. The record cannot be unloaded then.
+
+        Strings are decoded and encoded with `encoding` if given.
+        """
+
+        (
+            record_type,
+            self.size,
+            flags,
+            formid,
+            self.timestamp,
+            self.version_control_info,
+            self.internal_version,
+            self.unknown,
+        ) = read_struct(stream, RECORD_HEADER)
+        self.type = record_type.decode()
+        self.flags = RecordFlags(flags)
+        self.formid = f"{formid:08X}"
+
+        self.header_flags = header_flags
+        self.encoding = encoding
+        self.discard_data = discard_data
+
+        # Data is only decompressed and parsed on first access of subrecords
+        self.raw_data = stream.read(self.size)
+        self._data = None
+        self._subrecords = None
+
         if RecordFlags.Compressed in self.flags:
-            decompressed_size = Integer.parse(stream, Integer.IntType.UInt32)
-            self.data = zlib.decompress(stream.read(self.size - 4))
-            self.size = decompressed_size
-        else:
-            self.data = stream.read(self.size)
+            self.size = Integer.parse(self.raw_data, Integer.IntType.UInt32)
+
+    @property
+    def data(self) -> bytes | memoryview:
+        """
+        Decompressed record data.
+        """
+
+        if self._data is None:
+            if RecordFlags.Compressed in self.flags:
+                self._data = zlib.decompress(self.raw_data[4:])
+            else:
+                self._data = self.raw_data
+
+        return self._data
+
+    @property
+    def subrecords(self) -> list[Subrecord]:
+        """
+        Subrecords of this record, parsed on first access.
+        """
+
+        if self._subrecords is None:
+            self.parse_data()
+
+            if self.discard_data:
+                self._data = None
+                self.raw_data = None
+
+        return self._subrecords
+
+    @subrecords.setter
+    def subrecords(self, subrecords: list[Subrecord]):
+        self._subrecords = subrecords
+
+    @property
+    def is_loaded(self) -> bool:
+        """
+        Whether the subrecords of this record are parsed.
+        """
+
+        return self._subrecords is not None
+
+    def unload(self):
+        """
+        Drops parsed subrecords and decompressed data to free memory.
+        They are parsed again on next access, unsaved changes are lost.
+        """
+
+        if self.raw_data is None:
+            raise ValueError("Record data was discarded and cannot be parsed again!")
+
+        self._data = None
+        self._subrecords = None
+
+    def parse_data(self):
+        header_flags = self.header_flags
 
         # Parse subrecords (also known as fields)
         match self.type:
@@ -67,7 +235,7 @@ class Record:
                 self.parse_subrecords(header_flags)
 
     def parse_qust_record(self, header_flags: RecordFlags):
-        stream = BytesIO(self.data)
+        stream = get_stream(self.data)
         self.subrecords = []
 
         def calc_condition_index(stage_index: int) -> int:
@@ -87,7 +255,7 @@ class Record:
             hashes: list[int] = []
 
             for subrecord in ctda_subrecords[::-1]:
-                value = abs(hash(subrecord.data))
+                value = self.get_data_hash(subrecord.data)
                 hashes.append(value)
 
             index = get_checksum(sum(hashes) - stage_index)
@@ -105,12 +273,12 @@ class Record:
             else:
                 subrecord: Subrecord = SUBRECORD_MAP.get(subrecord_type, Subrecord)()
 
-            subrecord.parse(stream, header_flags)
+            subrecord.parse(stream, header_flags, self.encoding)
 
             match subrecord_type:
                 # Calculate stage "index" from INDX subrecord
                 case "INDX":
-                    current_stage_index = abs(hash(subrecord.data))
+                    current_stage_index = self.get_data_hash(subrecord.data)
 
                 # Set current log entry index as index of string
                 case "CNAM":
@@ -126,8 +294,22 @@ class Record:
 
             self.subrecords.append(subrecord)
 
+    @classmethod
+    def get_data_hash(cls, data: bytes | memoryview) -> int:
+        """
+        Returns a non-negative hash of `data` according to `index_scheme`.
+        """
+
+        if cls.index_scheme == IndexScheme.Hash:
+            return abs(hash(bytes(data)))
+
+        # 63 bits like `hash()` to keep the spread of the checksum indices
+        digest = hashlib.blake2b(data, digest_size=8).digest()
+
+        return int.from_bytes(digest, "little") >> 1
+
     def parse_info_record(self, header_flags: RecordFlags):
-        stream = BytesIO(self.data)
+        stream = get_stream(self.data)
         self.subrecords = []
         current_index = 0
 
@@ -139,7 +321,7 @@ class Record:
             else:
                 subrecord: Subrecord = SUBRECORD_MAP.get(subrecord_type, Subrecord)()
 
-            subrecord.parse(stream, header_flags)
+            subrecord.parse(stream, header_flags, self.encoding)
 
             match subrecord_type:
                 # Get response id
@@ -153,7 +335,7 @@ class Record:
             self.subrecords.append(subrecord)
 
     def parse_perk_record(self, header_flags: RecordFlags):
-        stream = BytesIO(self.data)
+        stream = get_stream(self.data)
         self.subrecords = []
 
         perk_type = None
@@ -169,7 +351,7 @@ class Record:
             else:
                 subrecord: Subrecord = SUBRECORD_MAP.get(subrecord_type, Subrecord)()
 
-            subrecord.parse(stream, header_flags)
+            subrecord.parse(stream, header_flags, self.encoding)
             self.subrecords.append(subrecord)
 
             match subrecord_type:
@@ -196,7 +378,7 @@ class Record:
                         )
 
     def parse_subrecords(self, header_flags: RecordFlags):
-        stream = BytesIO(self.data)
+        stream = get_stream(self.data)
         self.subrecords = []
         itxt_index = 0
 
@@ -208,7 +390,7 @@ class Record:
             else:
                 subrecord: Subrecord = SUBRECORD_MAP.get(subrecord_type, Subrecord)()
 
-            subrecord.parse(stream, header_flags)
+            subrecord.parse(stream, header_flags, self.encoding)
 
             if subrecord.type == "ITXT":
                 subrecord.index = itxt_index
@@ -216,26 +398,51 @@ class Record:
 
             self.subrecords.append(subrecord)
 
-    def dump(self) -> bytes:
-        # Prepare Data field
-        data = b"".join(subrecord.dump() for subrecord in self.subrecords)
+    def get_raw_data(self) -> bytes | memoryview:
+        """
+        Returns the record data as stored in the plugin file.
+
+        Untouched records return their data as it was read instead of
+        recompressing it.
+        """
+
+        if self._subrecords is None:
+            return self.raw_data
+
+        data = b"".join(subrecord.dump(self.encoding) for subrecord in self.subrecords)
 
         if RecordFlags.Compressed in self.flags:
             uncompressed_size = Integer.dump(len(data), Integer.IntType.UInt32)
             data = uncompressed_size + zlib.compress(data)
 
+        return data
+
+    def write(self, stream: BinaryIO) -> int:
+        """
+        Writes the record to `stream` and returns the number of written bytes.
+        """
+
+        data = self.get_raw_data()
         self.size = len(data)
 
-        # Combine all values
-        self.data = b""
-        self.data += self.type.encode()
-        self.data += Integer.dump(self.size, Integer.IntType.UInt32)
-        self.data += RecordFlags.dump(self.flags, Integer.IntType.UInt32)
-        self.data += Hex.dump(self.formid)
-        self.data += Integer.dump(self.timestamp, Integer.IntType.UInt16)
-        self.data += Integer.dump(self.version_control_info, Integer.IntType.UInt16)
-        self.data += Integer.dump(self.internal_version, Integer.IntType.UInt16)
-        self.data += Integer.dump(self.unknown, Integer.IntType.UInt16)
-        self.data += data
-
-        return self.data
+        stream.write(
+            RECORD_HEADER.pack(
+                self.type.encode(),
+                self.size,
+                self.flags.value,
+                int(self.formid, base=16),
+                self.timestamp,
+                self.version_control_info,
+                self.internal_version,
+                self.unknown,
+            )
+        )
+        stream.write(data)
+
+        return RECORD_HEADER.size + self.size
+
+    def dump(self) -> bytes:
+        stream = BytesIO()
+        self.write(stream)
+
+        return stream.getvalue()
@@ -0,0 +1,172 @@
+"""
+Copyright (c) Cutleast
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Iterator
+
+from .datatypes import GROUP_HEADER, RECORD_HEADER
+from .encoding import detect_plugin_encoding
+from .flags import RecordFlags
+from .plugin import Plugin
+from .plugin_string import PluginString
+from .record import Record
+from .string_table import StringTables
+from .subrecord import MAST
+from .utilities import STRING_RECORDS, BufferStream, map_file
+
+
+class StringScanner:
+    """
+    Extracts strings from a plugin file without parsing it completely.
+
+    Only records whose type is listed in `STRING_RECORDS` are parsed,
+    every other record and all group headers are skipped by their size.
+    The result matches `Plugin.extract_strings()`.
+
+    Strings of localized plugins are looked up in their string tables.
+    """
+
+    path: Path
+    per_string_encoding: bool
+
+    header: Record
+    encoding: str | None
+    """
+    Encoding of the strings in the plugin, see `Plugin.encoding`.
+    """
+
+    string_tables: StringTables | None
+
+    log = logging.getLogger("PluginInterface.StringScanner")
+
+    def __init__(self, path: Path, per_string_encoding: bool = False):
+        self.path = path
+        self.per_string_encoding = per_string_encoding
+        self.encoding = None
+        self.string_tables = None
+
+    def scan(
+        self,
+        extract_localized: bool = False,
+        unfiltered: bool = False,
+        progress_callback: Callable[[int, int], None] | None = None,
+    ) -> Iterator[PluginString]:
+        """
+        Yields strings from plugin file.
+
+        Only yields strings that pass a filter if `unfiltered` is False.
+        `progress_callback` is called with the number of scanned
+        and total top level groups after each group.
+        """
+
+        self.log.info(f"Scanning {str(self.path)!r}...")
+
+        stream = BufferStream(map_file(self.path))
+        yield from self.scan_stream(
+            stream, extract_localized, unfiltered, progress_callback
+        )
+
+        self.log.info("Scanning complete.")
+
+    def scan_stream(
+        self,
+        stream: BufferStream,
+        extract_localized: bool = False,
+        unfiltered: bool = False,
+        progress_callback: Callable[[int, int], None] | None = None,
+    ) -> Iterator[PluginString]:
+        file_size = len(stream.view)
+
+        if not self.per_string_encoding:
+            self.encoding = detect_plugin_encoding(stream.view)
+
+        self.header = Record()
+        self.header.parse(stream, [], encoding=self.encoding)
+
+        if RecordFlags.Localized in self.header.flags:
+            self.string_tables = StringTables.find(self.path)
+
+            if self.string_tables is None:
+                self.log.warning(
+                    f"No string tables found for localized plugin {self.path.name!r}."
+                )
+
+        if progress_callback is not None:
+            total_groups = self.count_groups(stream)
+            scanned_groups = 0
+
+        masters = [
+            subrecord.file
+            for subrecord in self.header.subrecords
+            if isinstance(subrecord, MAST)
+        ]
+        is_light = self.path.suffix.lower() == ".esl" or (
+            RecordFlags.LightMaster in self.header.flags
+        )
+
+        while stream.tell() < file_size:
+            # Strings are unique per top level group, see Plugin.extract_strings()
+            group_size = GROUP_HEADER.unpack_from(stream.view, stream.pos)[1]
+            group_end = stream.tell() + group_size
+            stream.seek(GROUP_HEADER.size, os.SEEK_CUR)
+
+            strings: set[PluginString] = set()
+
+            for record in self.scan_records(stream, group_end):
+                for string, _ in Plugin.extract_record_strings(
+                    record,
+                    self.path.name,
+                    masters,
+                    is_light,
+                    extract_localized,
+                    unfiltered,
+                    self.string_tables,
+                ):
+                    if string not in strings:
+                        strings.add(string)
+                        yield string
+
+            if progress_callback is not None:
+                scanned_groups += 1
+                progress_callback(scanned_groups, total_groups)
+
+    @staticmethod
+    def count_groups(stream: BufferStream) -> int:
+        """
+        Counts top level groups from the current position to the end of `stream`.
+        """
+
+        count = 0
+        pos = stream.pos
+
+        while pos < stream.end:
+            pos += GROUP_HEADER.unpack_from(stream.view, pos)[1]
+            count += 1
+
+        return count
+
+    def scan_records(self, stream: BufferStream, end: int) -> Iterator[Record]:
+        """
+        Yields parsed records with string subrecords until `end` is reached.
+
+        Nested groups are entered by skipping their header,
+        records without string subrecords are skipped completely.
+        """
+
+        while stream.tell() < end:
+            record_type, size = RECORD_HEADER.unpack_from(stream.view, stream.pos)[:2]
+
+            # Group and record headers have the same size
+            if record_type == b"GRUP":
+                stream.seek(GROUP_HEADER.size, os.SEEK_CUR)
+
+            elif record_type.decode() in STRING_RECORDS:
+                record = Record()
+                record.parse(stream, self.header.flags, encoding=self.encoding)
+                yield record
+
+            else:
+                stream.seek(RECORD_HEADER.size + size, os.SEEK_CUR)
@@ -0,0 +1,421 @@
+"""
+Copyright (c) Cutleast
+"""
+
+import logging
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+from .bsa import BSAArchive, get_hash
+from .datatypes import RECORD_HEADER, RawString
+from .flags import RecordFlags
+from .utilities import BufferStream, map_file, read_zstring
+
+TABLE_HEADER = struct.Struct("<II")
+"""
+Number of strings and size of the string data.
+"""
+
+DIRECTORY_ENTRY = struct.Struct("<II")
+"""
+ID and offset of a string.
+"""
+
+LENGTH_PREFIX = struct.Struct("<I")
+
+
+class StringTable:
+    """
+    Strings of a localized plugin in a STRINGS, DLSTRINGS or ILSTRINGS table.
+
+    The table is read from a buffer, for eg. a memory mapped file.
+    Its directory of string IDs and offsets is indexed on the first lookup
+    and strings are only decoded when they are looked up.
+    """
+
+    type: str
+    """
+    Table type, the file extension in upper case.
+    """
+
+    view: memoryview
+
+    TYPES = ("STRINGS", "DLSTRINGS", "ILSTRINGS")
+
+    def __init__(self, data: bytes | memoryview, type: str):
+        self.view = data if isinstance(data, memoryview) else memoryview(data)
+        self.type = type.upper()
+        self.__offsets: dict[int, int] | None = None
+
+        count = 0
+        if len(self.view) >= TABLE_HEADER.size:
+            count = TABLE_HEADER.unpack_from(self.view)[0]
+
+        self.__directory_start = TABLE_HEADER.size
+        self.__data_start = TABLE_HEADER.size + count * DIRECTORY_ENTRY.size
+
+    @classmethod
+    def from_file(cls, path: Path) -> "StringTable":
+        return cls(map_file(path), path.suffix[1:])
+
+    def __len__(self) -> int:
+        return len(self.get_offsets())
+
+    def __contains__(self, string_id: int) -> bool:
+        return string_id in self.get_offsets()
+
+    def get_offsets(self) -> dict[int, int]:
+        """
+        Returns the offsets of the strings by their IDs.
+        """
+
+        if self.__offsets is None:
+            # Ignore incomplete entries of truncated tables
+            size = min(self.__data_start, len(self.view)) - self.__directory_start
+            size = max(size, 0) // DIRECTORY_ENTRY.size * DIRECTORY_ENTRY.size
+            directory = self.view[self.__directory_start : self.__directory_start + size]
+            self.__offsets = dict(DIRECTORY_ENTRY.iter_unpack(directory))
+
+        return self.__offsets
+
+    def get_data(self, string_id: int) -> bytes | None:
+        """
+        Returns the encoded string with `string_id` without its null terminator
+        or None if the table does not contain it.
+        """
+
+        offset = self.get_offsets().get(string_id)
+
+        if offset is None:
+            return None
+
+        start = self.__data_start + offset
+
+        # Offsets of corrupt or truncated tables may point past their end
+        if start >= len(self.view):
+            return None
+
+        # Strings in DLSTRINGS and ILSTRINGS are prefixed with their length
+        if self.type != "STRINGS":
+            if start + LENGTH_PREFIX.size > len(self.view):
+                return None
+
+            length = LENGTH_PREFIX.unpack_from(self.view, start)[0]
+            start += LENGTH_PREFIX.size
+            return bytes(self.view[start : start + length]).split(b"\x00", 1)[0]
+
+        return read_zstring(BufferStream(self.view, start)) or b""
+
+    def get(self, string_id: int, encoding: str | None = None) -> RawString | None:
+        data = self.get_data(string_id)
+
+        if data is None:
+            return None
+
+        return RawString.decode(data, encoding)
+
+
+@dataclass(slots=True)
+class StringTableFile:
+    """
+    Class for a string table file, either a loose file or a file in a BSA archive.
+    """
+
+    path: Path
+    """
+    Path of the loose table or of the archive that contains the table.
+    """
+
+    type: str
+    archive_path: str | None = None
+    """
+    Path of the table in the archive or None if the table is a loose file.
+    """
+
+    def open(self) -> StringTable:
+        if self.archive_path is None:
+            return StringTable.from_file(self.path)
+
+        data = BSAArchive(self.path).read(self.archive_path)
+
+        return StringTable(data or b"", self.type)
+
+
+ArchiveListing = tuple[list[str] | None, frozenset[int]]
+"""
+Names, if the archive contains file names, and name hashes of the files
+in the `strings` folder of an archive.
+"""
+
+
+class StringTables:
+    """
+    String tables of a localized plugin in the `Strings` folder next to it,
+    named `<plugin>_<language>.STRINGS`, `.DLSTRINGS` and `.ILSTRINGS`.
+
+    Like in the game, tables are also read from the BSA archives next to
+    the plugin, loose tables override tables in archives.
+
+    Tables are opened on the first lookup.
+    """
+
+    files: list[StringTableFile]
+    language: str
+
+    DEFAULT_LANGUAGE = "english"
+
+    LANGUAGES = (
+        "english",
+        "chinese",
+        "czech",
+        "french",
+        "german",
+        "italian",
+        "japanese",
+        "polish",
+        "russian",
+        "spanish",
+    )
+    """
+    Languages that are looked up in archives without file names.
+    """
+
+    archive_listings: dict[tuple[Path, int, int], ArchiveListing | None] = {}
+    """
+    Listings of the `strings` folder of archives by path, size and
+    modification time, None for archives that could not be read.
+    """
+
+    log = logging.getLogger("PluginInterface.StringTables")
+
+    def __init__(self, files: list[StringTableFile], language: str):
+        self.files = files
+        self.language = language
+        self.__tables: list[StringTable] | None = None
+
+    @classmethod
+    def find(cls, plugin: Path, language: str | None = None) -> "StringTables | None":
+        """
+        Finds the string tables of `plugin` in `language` or None if it has none.
+
+        Without a `language`, the only language of the plugin is used. If there
+        are several, English is preferred, then the first in alphabetical order.
+        """
+
+        tables_by_language = cls.get_tables_by_language(plugin)
+
+        if language is None:
+            if not tables_by_language:
+                return None
+
+            languages = sorted(tables_by_language)
+            language = languages[0]
+
+            if len(languages) > 1:
+                if cls.DEFAULT_LANGUAGE in tables_by_language:
+                    language = cls.DEFAULT_LANGUAGE
+
+                cls.log.info(
+                    f"Found string tables of {plugin.name!r} in {', '.join(languages)}, "
+                    f"using {language}."
+                )
+
+        files = tables_by_language.get(language.lower())
+
+        if not files:
+            return None
+
+        return cls(files, language.lower())
+
+    @classmethod
+    def get_tables_by_language(
+        cls, plugin: Path
+    ) -> dict[str, list[StringTableFile]]:
+        """
+        Returns the string table files of `plugin` by their language,
+        each sorted by table type.
+        """
+
+        tables_by_language: dict[str, list[StringTableFile]] = {}
+        prefix = plugin.stem.lower() + "_"
+
+        try:
+            with os.scandir(plugin.parent) as entries:
+                plugin_dir_entries = list(entries)
+        except OSError:
+            return tables_by_language
+
+        strings_dirs = [
+            entry.path
+            for entry in plugin_dir_entries
+            if entry.name.lower() == "strings" and entry.is_dir()
+        ]
+        archives = sorted(
+            (
+                Path(entry.path)
+                for entry in plugin_dir_entries
+                if entry.name.lower().endswith(".bsa") and entry.is_file()
+            ),
+            key=lambda path: path.name.lower(),
+        )
+
+        for strings_dir in strings_dirs:
+            with os.scandir(strings_dir) as entries:
+                for entry in entries:
+                    stem, _, extension = entry.name.rpartition(".")
+                    stem = stem.lower()
+
+                    if (
+                        extension.upper() in StringTable.TYPES
+                        and stem.startswith(prefix)
+                        and entry.is_file()
+                    ):
+                        language = stem[len(prefix) :]
+                        tables_by_language.setdefault(language, []).append(
+                            StringTableFile(Path(entry.path), extension.upper())
+                        )
+
+        for archive_path in archives:
+            for name in cls.get_archive_tables(archive_path, prefix):
+                stem, _, extension = name.lower().rpartition(".")
+                language = stem[len(prefix) :]
+                files = tables_by_language.setdefault(language, [])
+
+                # Loose tables and tables in previous archives take precedence
+                if any(file.type == extension.upper() for file in files):
+                    continue
+
+                files.append(
+                    StringTableFile(archive_path, extension.upper(), "strings\\" + name)
+                )
+
+        for files in tables_by_language.values():
+            files.sort(key=lambda file: StringTable.TYPES.index(file.type))
+
+        return tables_by_language
+
+    @classmethod
+    def get_archive_listing(cls, archive_path: Path) -> ArchiveListing | None:
+        """
+        Returns the listing of the `strings` folder of the archive at
+        `archive_path` or None if it cannot be read.
+
+        Listings are kept until the archive changes, so each archive
+        is only read once for all plugins next to it.
+        """
+
+        try:
+            stat = archive_path.stat()
+        except OSError:
+            return None
+
+        key = (archive_path, stat.st_size, stat.st_mtime_ns)
+
+        if key not in cls.archive_listings:
+            try:
+                archive = BSAArchive(archive_path)
+                listing = (
+                    archive.list_folder("strings"),
+                    frozenset(archive.get_file_hashes("strings")),
+                )
+            except (OSError, ValueError, struct.error) as ex:
+                cls.log.warning(f"Failed to read archive {archive_path.name!r}: {ex}")
+                listing = None
+
+            cls.archive_listings[key] = listing
+
+        return cls.archive_listings[key]
+
+    @classmethod
+    def get_archive_tables(cls, archive_path: Path, prefix: str) -> list[str]:
+        """
+        Returns the names of the string tables in the `strings` folder
+        of the archive at `archive_path` whose names start with `prefix`.
+
+        If the archive does not contain file names, the tables of
+        the known languages are looked up by their hashes.
+        """
+
+        listing = cls.get_archive_listing(archive_path)
+
+        if listing is None:
+            return []
+
+        names, hashes = listing
+
+        if not hashes:
+            return []
+
+        if names is None:
+            names = [
+                f"{prefix}{language}.{type.lower()}"
+                for language in cls.LANGUAGES
+                for type in StringTable.TYPES
+            ]
+            return [name for name in names if get_hash(name) in hashes]
+
+        return [
+            name
+            for name in names
+            if name.lower().startswith(prefix)
+            and name.rpartition(".")[2].upper() in StringTable.TYPES
+        ]
+
+    @staticmethod
+    def is_localized(plugin: Path) -> bool:
+        """
+        Checks the Localized flag in the header of `plugin`
+        without reading the rest of it.
+        """
+
+        try:
+            with plugin.open("rb") as file:
+                flags = RECORD_HEADER.unpack(file.read(RECORD_HEADER.size))[2]
+        except (OSError, struct.error):
+            return False
+
+        return RecordFlags.Localized in RecordFlags(flags)
+
+    @classmethod
+    def get_files(cls, plugin: Path) -> list[Path]:
+        """
+        Returns the files that the localized strings of `plugin` are read from,
+        including the archives that contain string tables.
+
+        The string tables are only searched if `plugin` is localized.
+        """
+
+        if not cls.is_localized(plugin):
+            return []
+
+        string_tables = cls.find(plugin)
+
+        if string_tables is None:
+            return []
+
+        return list(dict.fromkeys(file.path for file in string_tables.files))
+
+    @property
+    def tables(self) -> list[StringTable]:
+        if self.__tables is None:
+            self.__tables = [file.open() for file in self.files]
+
+        return self.__tables
+
+    def get(self, string_id: int) -> RawString | None:
+        """
+        Returns the string with `string_id` from the first table that contains it.
+
+        IDs are unique across the tables of a plugin, so the table type
+        of a string subrecord does not have to be known.
+        """
+
+        for table in self.tables:
+            string = table.get(string_id)
+
+            if string is not None:
+                return string
+
+        return None
@@ -3,11 +3,18 @@ Copyright (c) Cutleast
 """
 
 import logging
-from io import BufferedReader, BytesIO
+from io import BufferedReader
 
-from .datatypes import Float, Hex, Integer, RawString
+from .datatypes import SUBRECORD_HEADER, Float, Hex, Integer, RawString
 from .flags import RecordFlags
-from .utilities import prettyprint_object
+from .utilities import (
+    get_attributes,
+    get_state,
+    get_stream,
+    prettyprint_object,
+    read_struct,
+    set_state,
+)
 
 
 class Subrecord:
@@ -17,7 +24,10 @@ class Subrecord:
 
     type: str
     size: int
-    data: bytes
+    data: bytes | memoryview
+
+    # Index is also set on other subrecords while parsing INFO, PERK and QUST records
+    __slots__ = ("type", "size", "data", "index")
 
     log = logging.getLogger("PluginParser.Subrecord")
 
@@ -31,17 +41,28 @@ class Subrecord:
         return prettyprint_object(self)
 
     def __str__(self):
-        return str(self.__dict__)
+        return str(get_attributes(self))
+
+    def __getstate__(self) -> dict:
+        return get_state(self)
+
+    def __setstate__(self, state: dict):
+        set_state(self, state)
 
     def __len__(self):
         return len(self.dump())
 
-    def parse(self, stream: BufferedReader, header_flags: RecordFlags):
-        self.type = stream.read(4).decode()
-        self.size = Integer.parse(stream, Integer.IntType.UInt16)
+    def parse(
+        self,
+        stream: BufferedReader,
+        header_flags: RecordFlags,
+        encoding: str | None = None,
+    ):
+        subrecord_type, self.size = read_struct(stream, SUBRECORD_HEADER)
+        self.type = subrecord_type.decode()
         self.data = stream.read(self.size)
 
-    def dump(self) -> bytes:
+    def dump(self, encoding: str | None = None) -> bytes:
         self.size = len(self.data)
 
         data = b""
@@ -61,23 +82,30 @@ class HEDR(Subrecord):
     records_num: int
     next_object_id: str
 
-    def parse(self, stream: BufferedReader, header_flags: RecordFlags):
-        super().parse(stream, header_flags)
+    __slots__ = ("version", "records_num", "next_object_id")
+
+    def parse(
+        self,
+        stream: BufferedReader,
+        header_flags: RecordFlags,
+        encoding: str | None = None,
+    ):
+        super().parse(stream, header_flags, encoding)
 
-        stream = BytesIO(self.data)
+        stream = get_stream(self.data)
 
         self.version = Float.parse(stream, Float.FloatType.Float32)
         self.records_num = Integer.parse(stream, Integer.IntType.UInt32)
         self.next_object_id = Hex.parse(stream)
 
-    def dump(self) -> bytes:
+    def dump(self, encoding: str | None = None) -> bytes:
         self.data = b""
 
         self.data += Float.dump(self.version, Float.FloatType.Float32)
         self.data += Integer.dump(self.records_num, Integer.IntType.UInt32)
         self.data += Hex.dump(self.next_object_id)
 
-        return super().dump()
+        return super().dump(encoding)
 
 
 class EDID(Subrecord):
@@ -87,15 +115,26 @@ class EDID(Subrecord):
 
     editor_id: RawString
 
-    def parse(self, stream: BufferedReader, header_flags: RecordFlags):
-        super().parse(stream, header_flags)
+    __slots__ = ("editor_id",)
 
-        self.editor_id = RawString.parse(self.data, RawString.StrType.ZString)
+    def parse(
+        self,
+        stream: BufferedReader,
+        header_flags: RecordFlags,
+        encoding: str | None = None,
+    ):
+        super().parse(stream, header_flags, encoding)
 
-    def dump(self) -> bytes:
-        self.data = RawString.dump(self.editor_id, RawString.StrType.ZString)
+        self.editor_id = RawString.parse(
+            self.data, RawString.StrType.ZString, encoding=encoding
+        )
 
-        return super().dump()
+    def dump(self, encoding: str | None = None) -> bytes:
+        self.data = RawString.dump(
+            self.editor_id, RawString.StrType.ZString, encoding
+        )
+
+        return super().dump(encoding)
 
 
 class StringSubrecord(Subrecord):
@@ -104,19 +143,31 @@ class StringSubrecord(Subrecord):
     """
 
     string: RawString | int
-    index: int = 0
+    index: int
+
+    __slots__ = ("string",)
 
     log = logging.getLogger("PluginParser.StringSubrecord")
 
-    def parse(self, stream: BufferedReader, header_flags: RecordFlags):
-        super().parse(stream, header_flags)
+    def __init__(self, type: str = None):
+        super().__init__(type)
+
+        self.index = 0
+
+    def parse(
+        self,
+        stream: BufferedReader,
+        header_flags: RecordFlags,
+        encoding: str | None = None,
+    ):
+        super().parse(stream, header_flags, encoding)
 
         if RecordFlags.Localized in header_flags:
             self.string = Integer.parse(self.data, Integer.IntType.UInt32)
 
         else:
             self.string = RawString.parse(
-                self.data, RawString.StrType.ZString, self.size
+                self.data, RawString.StrType.ZString, self.size, encoding
             )
 
     def set_string(self, string: str):
@@ -124,14 +175,16 @@ class StringSubrecord(Subrecord):
 
         self.string = RawString.from_str(string, encoding)
 
-    def dump(self) -> bytes:
+    def dump(self, encoding: str | None = None) -> bytes:
         if isinstance(self.string, int):
             self.data = Integer.dump(self.string, Integer.IntType.UInt32)
 
         else:
-            self.data = RawString.dump(self.string, RawString.StrType.ZString)
+            self.data = RawString.dump(
+                self.string, RawString.StrType.ZString, encoding
+            )
 
-        return super().dump()
+        return super().dump(encoding)
 
 
 class MAST(Subrecord):
@@ -141,15 +194,24 @@ class MAST(Subrecord):
 
     file: str
 
-    def parse(self, stream: BufferedReader, header_flags: RecordFlags):
-        super().parse(stream, header_flags)
+    __slots__ = ("file",)
+
+    def parse(
+        self,
+        stream: BufferedReader,
+        header_flags: RecordFlags,
+        encoding: str | None = None,
+    ):
+        super().parse(stream, header_flags, encoding)
 
-        self.file = RawString.parse(self.data, RawString.StrType.ZString)
+        self.file = RawString.parse(
+            self.data, RawString.StrType.ZString, encoding=encoding
+        )
 
-    def dump(self) -> bytes:
-        self.data = RawString.dump(self.file, RawString.StrType.ZString)
+    def dump(self, encoding: str | None = None) -> bytes:
+        self.data = RawString.dump(self.file, RawString.StrType.ZString, encoding)
 
-        return super().dump()
+        return super().dump(encoding)
 
 
 class XXXX(Subrecord):
@@ -159,14 +221,21 @@ class XXXX(Subrecord):
 
     field_size: int
 
-    def parse(self, stream: BufferedReader, header_flags: RecordFlags):
-        super().parse(stream, header_flags)
+    __slots__ = ("field_size",)
+
+    def parse(
+        self,
+        stream: BufferedReader,
+        header_flags: RecordFlags,
+        encoding: str | None = None,
+    ):
+        super().parse(stream, header_flags, encoding)
 
         self.field_size = Integer.parse(self.data, (self.size, False))
         # Add header and data of following subrecord to this
         self.data = stream.read(self.field_size + 7)
 
-    def dump(self):
+    def dump(self, encoding: str | None = None) -> bytes:
         data = b""
 
         data += self.type.encode()
@@ -191,10 +260,26 @@ class TRDT(Subrecord):
     use_emo_anim: int
     junk2: bytes
 
-    def parse(self, stream: BufferedReader, header_flags: RecordFlags):
-        super().parse(stream, header_flags)
+    __slots__ = (
+        "emotion_type",
+        "emotion_value",
+        "unknown1",
+        "response_id",
+        "junk1",
+        "sound_file",
+        "use_emo_anim",
+        "junk2",
+    )
+
+    def parse(
+        self,
+        stream: BufferedReader,
+        header_flags: RecordFlags,
+        encoding: str | None = None,
+    ):
+        super().parse(stream, header_flags, encoding)
 
-        stream = BytesIO(self.data)
+        stream = get_stream(self.data)
 
         self.emotion_type = Integer.parse(stream, Integer.IntType.UInt32)
         self.emotion_value = Integer.parse(stream, Integer.IntType.UInt32)
@@ -205,7 +290,7 @@ class TRDT(Subrecord):
         self.use_emo_anim = Integer.parse(stream, Integer.IntType.UInt8)
         self.junk2 = stream.read(3)
 
-    def dump(self):
+    def dump(self, encoding: str | None = None) -> bytes:
         self.data = b""
 
         self.data += Integer.dump(self.emotion_type, Integer.IntType.UInt32)
@@ -217,7 +302,7 @@ class TRDT(Subrecord):
         self.data += Integer.dump(self.use_emo_anim, Integer.IntType.UInt8)
         self.data += self.junk2
 
-        return super().dump()
+        return super().dump(encoding)
 
 
 class QOBJ(Subrecord):
@@ -227,15 +312,22 @@ class QOBJ(Subrecord):
 
     index: int
 
-    def parse(self, stream: BufferedReader, header_flags: RecordFlags):
-        super().parse(stream, header_flags)
+    __slots__ = ()
+
+    def parse(
+        self,
+        stream: BufferedReader,
+        header_flags: RecordFlags,
+        encoding: str | None = None,
+    ):
+        super().parse(stream, header_flags, encoding)
 
         self.index = Integer.parse(self.data, Integer.IntType.Int16)
 
-    def dump(self):
+    def dump(self, encoding: str | None = None) -> bytes:
         self.data = Integer.dump(self.index, Integer.IntType.Int16)
 
-        return super().dump()
+        return super().dump(encoding)
 
 
 class EPFT(Subrecord):
@@ -245,15 +337,22 @@ class EPFT(Subrecord):
 
     perk_type: int
 
-    def parse(self, stream: BufferedReader, header_flags: RecordFlags):
-        super().parse(stream, header_flags)
+    __slots__ = ("perk_type",)
+
+    def parse(
+        self,
+        stream: BufferedReader,
+        header_flags: RecordFlags,
+        encoding: str | None = None,
+    ):
+        super().parse(stream, header_flags, encoding)
 
         self.perk_type = Integer.parse(self.data, Integer.IntType.UInt8)
 
-    def dump(self):
+    def dump(self, encoding: str | None = None) -> bytes:
         self.data = Integer.dump(self.perk_type, Integer.IntType.UInt8)
 
-        return super().dump()
+        return super().dump(encoding)
 
 
 SUBRECORD_MAP: dict[str, type[Subrecord]] = {
@@ -2,8 +2,13 @@
 Copyright (c) Cutleast
 """
 
+import mmap
+import os
+import struct
+from contextlib import contextmanager
 from io import BufferedReader, BytesIO
 from pathlib import Path
+from typing import Iterator
 
 from . import jstyleson as json
 
@@ -20,13 +25,108 @@ def peek(stream: BufferedReader, length: int):
     Peeks into stream and returns data.
     """
 
-    data = stream.read(length)
+    data = bytes(stream.read(length))
 
     stream.seek(-length, 1)
 
     return data
 
 
+class BufferStream:
+    """
+    Read-only stream over a shared buffer, for eg. a memory mapped file.
+
+    Reads return zero-copy `memoryview` slices of the buffer
+    instead of `bytes` copies.
+    """
+
+    view: memoryview
+    start: int
+    end: int
+    pos: int
+
+    def __init__(self, buffer: bytes | memoryview, start: int = 0, end: int = None):
+        self.view = buffer if isinstance(buffer, memoryview) else memoryview(buffer)
+        self.start = start
+        self.end = len(self.view) if end is None else end
+        self.pos = start
+
+    def read(self, size: int = -1) -> memoryview:
+        if size < 0:
+            end = self.end
+        else:
+            end = min(self.pos + size, self.end)
+
+        data = self.view[self.pos : end]
+        self.pos = end
+
+        return data
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        match whence:
+            case os.SEEK_SET:
+                self.pos = self.start + offset
+            case os.SEEK_CUR:
+                self.pos += offset
+            case os.SEEK_END:
+                self.pos = self.end + offset
+
+        return self.tell()
+
+    def tell(self) -> int:
+        return self.pos - self.start
+
+
+def read_struct(stream: BufferedReader | BufferStream, layout: struct.Struct) -> tuple:
+    """
+    Reads and unpacks `layout` from `stream`.
+
+    Values are unpacked directly from the underlying buffer of a `BufferStream`.
+    """
+
+    if isinstance(stream, BufferStream):
+        values = layout.unpack_from(stream.view, stream.pos)
+        stream.pos += layout.size
+
+        return values
+
+    return layout.unpack(stream.read(layout.size))
+
+
+def map_file(path: Path) -> memoryview:
+    """
+    Maps file at `path` read-only into memory.
+
+    The mapping is closed as soon as the returned view
+    and all slices of it are released.
+    """
+
+    with path.open("rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return memoryview(b"")
+
+        return memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+@contextmanager
+def mapped_file(path: Path) -> Iterator[memoryview]:
+    """
+    Maps file at `path` read-only into memory until the context is left.
+
+    Unlike `map_file()`, the mapping is closed when the context is left,
+    so no slices of the view may be kept beyond it.
+    """
+
+    with path.open("rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield memoryview(b"")
+            return
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            with memoryview(mapping) as view:
+                yield view
+
+
 CHAR_WHITELIST = [
     "\n",
     "\r",
@@ -98,22 +198,48 @@ def is_valid_string(text: str):
     return all(char.isprintable() or char in CHAR_WHITELIST for char in text)
 
 
-def get_stream(data: BufferedReader | bytes) -> BytesIO:
+def get_stream(data: BufferedReader | bytes | memoryview) -> BytesIO | BufferStream:
     if isinstance(data, bytes):
         return BytesIO(data)
+    elif isinstance(data, memoryview):
+        return BufferStream(data)
 
     return data
 
 
-def read_data(data: BufferedReader | bytes, size: int) -> bytes:
+def read_data(data: BufferedReader | bytes | memoryview, size: int) -> bytes:
     """
     Returns `size` bytes from `data`.
     """
 
-    if isinstance(data, bytes):
-        return data[:size]
+    if isinstance(data, (bytes, memoryview)):
+        return bytes(data[:size])
     else:
-        return data.read(size)
+        return bytes(data.read(size))
+
+
+def read_zstring(stream: BufferedReader | BufferStream) -> bytes | None:
+    """
+    Reads a null-terminated string from `stream` and skips the terminator.
+
+    Returns the remaining data if the string is not terminated
+    and None if `stream` is already at its end.
+    """
+
+    chunks: list[bytes] = []
+
+    while chunk := bytes(stream.read(4096)):
+        end = chunk.find(b"\x00")
+
+        if end != -1:
+            chunks.append(chunk[:end])
+            # Put back the data after the terminator
+            stream.seek(end + 1 - len(chunk), 1)
+            return b"".join(chunks)
+
+        chunks.append(chunk)
+
+    return b"".join(chunks) if chunks else None
 
 
 def indent_text(text: str, indent: int = 4):
@@ -129,11 +255,50 @@ def indent_text(text: str, indent: int = 4):
         return "\n".join(lines)
 
 
+def get_attributes(obj: object) -> dict:
+    """
+    Returns the attributes of an object, including those stored in slots.
+    """
+
+    attributes = {}
+
+    for cls in reversed(type(obj).__mro__):
+        for name in cls.__dict__.get("__slots__", ()):
+            if hasattr(obj, name):
+                attributes[name] = getattr(obj, name)
+
+    attributes.update(getattr(obj, "__dict__", {}))
+
+    return attributes
+
+
+def get_state(obj: object) -> dict:
+    """
+    Returns the attributes of an object for pickling.
+
+    Memoryviews, for eg. into a memory mapped plugin, are copied to bytes.
+    """
+
+    return {
+        key: bytes(val) if isinstance(val, memoryview) else val
+        for key, val in get_attributes(obj).items()
+    }
+
+
+def set_state(obj: object, state: dict):
+    """
+    Restores the attributes of an object from `get_state()`.
+    """
+
+    for key, val in state.items():
+        setattr(obj, key, val)
+
+
 def prettyprint_object(obj: object):
     text = "\r{\n"
     text += f"    class = {type(obj).__name__}\n"
 
-    for key, val in obj.__dict__.items():
+    for key, val in get_attributes(obj).items():
         if isinstance(val, list):
             if len(val) == 0:
                 text += indent_text(f"{key}: list = []\n")
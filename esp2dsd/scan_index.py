@@ -0,0 +1,166 @@
+"""
+Persistent index of the plugins in mod directories.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+
+PLUGIN_EXTENSIONS = (".esp", ".esm", ".esl")
+
+PluginStat = tuple[int, float]
+"""
+Size and modification time of a plugin file.
+"""
+
+
+class ModScanIndex:
+    """
+    Records the plugins, their file stats and the Nexus mod id of each mod
+    directory so that unchanged mods do not have to be listed again.
+
+    The plugins of a mod are listed again when the modification time of
+    its directory changed, which happens when files are added, removed
+    or renamed. Files overwritten in place do not change it, so the stats
+    of plugins that are used must be refreshed with `refresh_plugin_stat()`.
+    The mod id is read again when `meta.ini` changed.
+    """
+
+    path: Path
+    entries: dict[str, dict]
+    """
+    Entries by mod directory.
+    """
+
+    FORMAT_VERSION = 1
+
+    log = logging.getLogger("esp2dsd.ModScanIndex")
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries = {}
+        self.__used: set[str] = set()
+        self.__changed = False
+
+    def load(self):
+        self.entries = {}
+
+        try:
+            with self.path.open(encoding="utf-8") as file:
+                index = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as ex:
+            self.log.warning(f"Failed to load scan index {str(self.path)!r}: {ex}")
+            return
+
+        if index.get("format_version") != self.FORMAT_VERSION:
+            return
+
+        self.entries = index.get("entries", {})
+
+    def save(self):
+        """
+        Saves the index if it changed, without the mods that were not used
+        since it was loaded.
+        """
+
+        for mod_path in list(self.entries):
+            if mod_path not in self.__used:
+                del self.entries[mod_path]
+                self.__changed = True
+
+        if not self.__changed:
+            return
+
+        index = {"format_version": self.FORMAT_VERSION, "entries": self.entries}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        with temp_path.open("w", encoding="utf-8") as file:
+            json.dump(index, file, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+        self.__changed = False
+
+    def get_entry(self, mod_path: str) -> dict:
+        self.__used.add(mod_path)
+
+        return self.entries.setdefault(mod_path, {})
+
+    def get_plugins(self, mod_path: str) -> dict[str, PluginStat]:
+        """
+        Returns the plugins in the top level of a mod directory
+        with their size and modification time.
+
+        Raises OSError if the directory cannot be listed.
+        """
+
+        entry = self.get_entry(mod_path)
+        mtime = os.stat(mod_path).st_mtime_ns
+
+        if entry.get("mtime") != mtime or "plugins" not in entry:
+            plugins: dict[str, PluginStat] = {}
+
+            with os.scandir(mod_path) as dir_entries:
+                for dir_entry in dir_entries:
+                    if dir_entry.name.lower().endswith(
+                        PLUGIN_EXTENSIONS
+                    ) and dir_entry.is_file():
+                        stat = dir_entry.stat()
+                        plugins[dir_entry.name] = (stat.st_size, stat.st_mtime)
+
+            entry["mtime"] = mtime
+            entry["plugins"] = plugins
+            self.__changed = True
+
+        return {name: tuple(stat) for name, stat in entry["plugins"].items()}
+
+    def refresh_plugin_stat(self, mod_path: str, name: str) -> PluginStat:
+        """
+        Returns the current size and modification time of the plugin `name`
+        in a mod directory and updates them in the index.
+
+        Raises OSError if the plugin does not exist anymore.
+        """
+
+        stat = os.stat(os.path.join(mod_path, name))
+        plugin_stat = (stat.st_size, stat.st_mtime)
+
+        plugins: dict = self.get_entry(mod_path).setdefault("plugins", {})
+        if tuple(plugins.get(name, ())) != plugin_stat:
+            plugins[name] = plugin_stat
+            self.__changed = True
+
+        return plugin_stat
+
+    def get_modid(self, mod_path: str) -> str | None:
+        """
+        Returns the lowercase mod id from the `meta.ini` of a mod directory
+        or None if it has none.
+        """
+
+        entry = self.get_entry(mod_path)
+        meta_file = os.path.join(mod_path, "meta.ini")
+
+        try:
+            meta_mtime = os.stat(meta_file).st_mtime_ns
+        except OSError:
+            meta_mtime = None
+
+        if entry.get("meta_mtime") != meta_mtime or "modid" not in entry:
+            modid = None
+
+            if meta_mtime is not None:
+                with open(meta_file, "r", encoding="utf-8") as file:
+                    for line in file:
+                        if line.startswith("modid="):
+                            modid = line.strip().split("=")[1].lower()
+                            break
+
+            entry["meta_mtime"] = meta_mtime
+            entry["modid"] = modid
+            self.__changed = True
+
+        return entry["modid"]
@@ -0,0 +1,218 @@
+"""
+Persistent cache of strings extracted from plugin files.
+"""
+
+import hashlib
+import logging
+import marshal
+import os
+import struct
+import sys
+import zlib
+from pathlib import Path
+
+from .plugin_interface.plugin_string import PluginString
+from .plugin_interface.record import IndexScheme, Record
+from .plugin_interface.string_table import StringTables
+
+
+class StringCache:
+    """
+    On-disk cache of the strings extracted from plugin files.
+
+    Each plugin is stored as one compressed binary entry in `cache_dir`.
+    Entries are keyed by path, size and modification time of the plugin
+    and its string tables, or by their names, sizes and content hashes
+    if `use_hash` is True.
+    The least recently used entries are evicted when the total size
+    of the cache exceeds `max_size` bytes.
+    """
+
+    cache_dir: Path
+    max_size: int
+    use_hash: bool
+
+    FORMAT_VERSION = 4
+
+    HEADER = struct.Struct("<4sHq")
+    """
+    Entry header: magic, format version and hash fingerprint.
+    """
+
+    MAGIC = b"DSDS"
+
+    HASH_INDEXED_TYPES = {"QUST CNAM"}
+    """
+    String types whose index is derived from `hash()` if `Record.index_scheme`
+    is `IndexScheme.Hash`, which is randomized per interpreter process.
+    """
+
+    HASH_FINGERPRINT = hash(b"esp2dsd.string_cache") or 1
+    """
+    Identifies the `hash()` randomization of the current process.
+    """
+
+    log = logging.getLogger("esp2dsd.StringCache")
+
+    def __init__(self, cache_dir: Path, max_size: int = 256 * 1024 * 1024, use_hash: bool = False):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.use_hash = use_hash
+
+    def get_file_identity(self, path: Path) -> str:
+        stat = path.stat()
+
+        if self.use_hash:
+            with path.open("rb") as file:
+                digest = hashlib.file_digest(file, "md5").hexdigest()
+            # The plugin name is part of the extracted FormIDs
+            return f"{path.name}|{stat.st_size}|{digest}"
+
+        return f"{path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}"
+
+    def get_entry_path(self, plugin: Path) -> Path:
+        identity = self.get_file_identity(plugin)
+
+        # Strings of localized plugins are extracted from their string tables
+        for path in StringTables.get_files(plugin):
+            identity += "|" + self.get_file_identity(path)
+
+        identity += f"|{self.FORMAT_VERSION}|{sys.version_info[:2]}"
+        identity += f"|{Record.index_scheme.value}"
+
+        return self.cache_dir / (hashlib.sha1(identity.encode()).hexdigest() + ".bin")
+
+    def get(self, plugin: Path) -> list[PluginString] | None:
+        """
+        Returns the cached strings of `plugin` or None if there are none.
+        """
+
+        entry_path = self.get_entry_path(plugin)
+
+        try:
+            data = entry_path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as ex:
+            self.log.warning(f"Failed to read cache entry of {plugin.name!r}: {ex}")
+            return None
+
+        try:
+            magic, version, fingerprint = self.HEADER.unpack_from(data)
+        except struct.error as ex:
+            self.remove_entry(entry_path, plugin, ex)
+            return None
+
+        if magic != self.MAGIC or version != self.FORMAT_VERSION:
+            return None
+
+        if fingerprint and fingerprint != self.HASH_FINGERPRINT:
+            self.log.debug(f"Cached indices of {plugin.name!r} are from another process.")
+            return None
+
+        try:
+            items = marshal.loads(zlib.decompress(data[self.HEADER.size :]))
+            strings = [
+                PluginString(
+                    editor_id,
+                    form_id,
+                    index,
+                    type,
+                    original_string=original_string,
+                    status=PluginString.Status[status],
+                )
+                for editor_id, form_id, index, type, original_string, status in items
+            ]
+        except (ValueError, EOFError, TypeError, KeyError, zlib.error) as ex:
+            self.remove_entry(entry_path, plugin, ex)
+            return None
+
+        # Mark entry as recently used
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+        self.log.debug(f"Loaded {len(strings)} string(s) of {plugin.name!r} from cache.")
+
+        return strings
+
+    def remove_entry(self, entry_path: Path, plugin: Path, error: Exception):
+        """
+        Deletes a corrupt entry, so that it is treated like a cache miss.
+        """
+
+        self.log.warning(f"Removing corrupt cache entry of {plugin.name!r}: {error}")
+
+        try:
+            os.remove(entry_path)
+        except OSError:
+            pass
+
+    def put(self, plugin: Path, strings: list[PluginString]):
+        """
+        Stores the strings of `plugin` and evicts old entries if necessary.
+        """
+
+        items = [
+            (
+                None if string.editor_id is None else str(string.editor_id),
+                string.form_id,
+                string.index,
+                string.type,
+                str(string.original_string),
+                string.status.name,
+            )
+            for string in strings
+        ]
+
+        fingerprint = 0
+        if Record.index_scheme == IndexScheme.Hash and any(
+            string.type in self.HASH_INDEXED_TYPES for string in strings
+        ):
+            fingerprint = self.HASH_FINGERPRINT
+
+        data = self.HEADER.pack(self.MAGIC, self.FORMAT_VERSION, fingerprint)
+        data += zlib.compress(marshal.dumps(items), 1)
+
+        entry_path = self.get_entry_path(plugin)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # Other processes may read the cache at the same time
+        temp_path = entry_path.with_name(f"{entry_path.name}.{os.getpid()}.tmp")
+        temp_path.write_bytes(data)
+        os.replace(temp_path, entry_path)
+
+        self.evict()
+
+    def evict(self):
+        """
+        Deletes least recently used entries until the cache fits into `max_size`.
+        """
+
+        # Other processes may evict the same entries at the same time
+        entries: list[tuple[float, int, os.DirEntry]] = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".bin"):
+                continue
+
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, entry))
+
+        entries.sort(key=lambda item: item[0])
+        total_size = sum(size for _, size, _ in entries)
+
+        while entries and total_size > self.max_size:
+            _, size, entry = entries.pop(0)
+            total_size -= size
+
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+
+            self.log.debug(f"Evicted {entry.name!r} from string cache.")
@@ -0,0 +1,62 @@
+"""
+Index for joining the strings of a translation with its original plugin.
+"""
+
+from typing import Iterable, Iterator
+
+from .plugin_interface.plugin_string import PluginString
+
+StringKey = tuple[str, str | None, str, int | None]
+
+
+class StringIndex:
+    """
+    Index of the strings of a plugin by FormID, EditorID, type and index.
+
+    FormIDs are compared case-insensitively since they contain the name
+    of the master plugin. If several strings have the same key,
+    the last one is indexed.
+    """
+
+    def __init__(self, strings: Iterable[PluginString] = ()):
+        get_key = self.get_key
+        self.__strings: dict[StringKey, PluginString] = {
+            get_key(string): string for string in strings
+        }
+
+    def __len__(self) -> int:
+        return len(self.__strings)
+
+    @staticmethod
+    def get_key(string: PluginString) -> StringKey:
+        form_id = string.form_id
+
+        return (
+            form_id.lower() if form_id is not None else "",
+            string.editor_id,
+            string.type,
+            string.index,
+        )
+
+    def add(self, string: PluginString):
+        self.__strings[self.get_key(string)] = string
+
+    def get(self, string: PluginString) -> PluginString | None:
+        """
+        Returns the indexed string with the same key as `string`.
+        """
+
+        return self.__strings.get(self.get_key(string))
+
+    def join(
+        self, strings: Iterable[PluginString]
+    ) -> Iterator[tuple[PluginString, PluginString | None]]:
+        """
+        Yields each of `strings` with its indexed counterpart or None.
+        """
+
+        get_key = self.get_key
+        get = self.__strings.get
+
+        for string in strings:
+            yield string, get(get_key(string))
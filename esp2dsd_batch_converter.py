@@ -1,18 +1,23 @@
 # -*- coding: utf-8 -*-
-from typing import List
+from typing import Callable, List
 from datetime import datetime
 import os
 import mobase
-import shutil
 from pathlib import Path
 from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox, QProgressDialog, QCheckBox, QTextEdit
 from PyQt6.QtGui import QIcon
-from PyQt6.QtCore import Qt, QCoreApplication
-import time
-import json
+from PyQt6.QtCore import Qt, QCoreApplication, QEventLoop, QObject, QThread, pyqtSignal
 import logging 
-from .utils import file_stat
-from .esp2dsd.converter import esp2dsd
+from .esp2dsd.batch import BatchConverter, ConversionJob
+from .esp2dsd.blacklist import Blacklist
+from .esp2dsd.generation import TranslationFile, convert_translation_files, find_translation_files
+from .esp2dsd.incorrect_pairs import IncorrectPairs
+from .esp2dsd.instrumentation import RunReport, measure
+from .esp2dsd.load_order import LoadOrder, ModInfo
+from .esp2dsd.manifest import OutputManifest
+from .esp2dsd.plugin_interface.record import IndexScheme, Record
+from .esp2dsd.scan_index import ModScanIndex
+from .esp2dsd.string_cache import StringCache
 
 def tr(msg: str) -> str:
     """翻译函数，使用QCoreApplication的translate方法"""
@@ -98,10 +103,11 @@ class DSDGenerator(mobase.IPluginTool):
         self._dialog = None # type: ignore
         self._parent = None
         self._incorrect_pairs_file = os.path.join(os.path.dirname(__file__), "incorrect_pairs.json")
+        self._string_cache_dir = os.path.join(os.path.dirname(__file__), "string_cache")
+        self._scan_index_file = os.path.join(os.path.dirname(__file__), "scan_index.json")
+        self._incorrect_pairs = IncorrectPairs(Path(self._incorrect_pairs_file))
         self._blacklist_cache = None
-        self._incorrect_pairs_cache = None
         self._last_blacklist_mtime = 0
-        self._last_incorrect_pairs_mtime = 0
 
     def init(self, organizer: mobase.IOrganizer):
         logger.debug(f"[DSDGenerator] Initializing with organizer: {organizer}")
@@ -147,6 +153,12 @@ class DSDGenerator(mobase.IPluginTool):
                 mobase.PluginSetting("output_mod_name", tr("Output Dir"), ""),
                 mobase.PluginSetting("auto_run", tr("Automatically generate DSD configs when game starts"), False),
                 mobase.PluginSetting("show_progress_when_auto_run", tr("Show progress dialog when auto generating"), True),
+                mobase.PluginSetting("max_workers", tr("Number of parallel conversions (0 = one per CPU core, 1 = no worker processes)"), 0),
+                mobase.PluginSetting("string_cache_size", tr("Maximum size of the extracted strings cache in MB (0 = disabled)"), 256),
+                mobase.PluginSetting("string_cache_use_hash", tr("Identify cached plugins by file hash instead of modification time"), False),
+                mobase.PluginSetting("compact_json", tr("Write DSD configs without indentation"), False),
+                mobase.PluginSetting("write_run_report", tr("Write timings of each run to dsd_run_report.json in the output mod"), False),
+                mobase.PluginSetting("legacy_string_indices", tr("Derive quest string indices like previous versions (not reproducible between runs)"), False),
             ]
         
     def displayName(self) -> str:
@@ -214,82 +226,20 @@ class DSDGenerator(mobase.IPluginTool):
                 return self._blacklist_cache
         return []
 
-    def _get_incorrect_pairs(self) -> dict:
-        logger.debug("[DSDGenerator] Getting incorrect pairs")
-        if os.path.exists(self._incorrect_pairs_file):
-            current_mtime = os.path.getmtime(self._incorrect_pairs_file)
-            if self._incorrect_pairs_cache is not None and current_mtime == self._last_incorrect_pairs_mtime:
-                return self._incorrect_pairs_cache
-            
-            try:
-                with open(self._incorrect_pairs_file, 'r', encoding='utf-8') as f:
-                    self._incorrect_pairs_cache = json.load(f)
-                    self._last_incorrect_pairs_mtime = current_mtime
-                    return self._incorrect_pairs_cache
-            except Exception:
-                return {}
-        return {}
-
-    def _is_valid_translation_pair(self, original_file: str, translation_file: str) -> bool:
-        logger.debug(f"[DSDGenerator] Validating translation pair: {original_file} -> {translation_file}")
-        logger.debug(f"Checking file pair: {original_file} <-> {translation_file}")
-        try:
-            orig_stat = os.stat(original_file)
-            trans_stat = os.stat(translation_file)
-            
-            # 检查文件大小比例
-            if trans_stat.st_size > orig_stat.st_size * 1.2 or trans_stat.st_size < orig_stat.st_size * 0.8:
-                return False
-
-            # 检查错误配对缓存
-            incorrect_pairs = self._get_incorrect_pairs()
-            file_name = os.path.basename(original_file)
-            if file_name in incorrect_pairs:
-                pair = incorrect_pairs[file_name]
-                if (pair["original"]["size"] == orig_stat.st_size and
-                    pair["original"]["mtime"] == orig_stat.st_mtime):
-                    # 检查 translations 列表中是否有匹配的 translation 文件
-                    for t in pair.get("translations", []):
-                        if (t["size"] == trans_stat.st_size and
-                            t["mtime"] == trans_stat.st_mtime):
-                            return False
-            return True
-        except Exception as e:
-            logger.warning(f"Error checking file pair: {str(e)}")
-            return False
-
-    def _record_incorrect_pair(self, original_file: str, translation_file: str):
-        logger.debug(f"[DSDGenerator] Recording incorrect pair: {original_file} -> {translation_file}")
-        try:
-            incorrect_pairs = self._get_incorrect_pairs()
-            file_name = os.path.basename(original_file)
-            orig_stat = file_stat(original_file)
-            trans_stat = file_stat(translation_file)
-            if file_name not in incorrect_pairs:
-                incorrect_pairs[file_name] = {
-                    "original": orig_stat,
-                    "translations": [trans_stat]
-                }
-            else:
-                # 如果 original 发生变化则重置 translations
-                if (incorrect_pairs[file_name]["original"]["size"] != orig_stat["size"] or
-                    incorrect_pairs[file_name]["original"]["mtime"] != orig_stat["mtime"]):
-                    incorrect_pairs[file_name]["original"] = orig_stat
-                    incorrect_pairs[file_name]["translations"] = [trans_stat]
-                else:
-                    # 添加到 translations 列表（避免重复）
-                    translations = incorrect_pairs[file_name].setdefault("translations", [])
-                    if not any(t["size"] == trans_stat["size"] and t["mtime"] == trans_stat["mtime"] for t in translations):
-                        translations.append(trans_stat)
-
-            self._incorrect_pairs_cache = incorrect_pairs
-            self._last_incorrect_pairs_mtime = time.time()
-
-            with open(self._incorrect_pairs_file, 'w', encoding='utf-8') as f:
-                json.dump(incorrect_pairs, f, indent=2, ensure_ascii=False)
-
-        except Exception as e:
-            logger.warning(f"Error recording incorrect pair: {str(e)}")
+    def _get_string_cache(self) -> StringCache | None:
+        # 缓存已提取的字符串，未修改的插件无需重新解析
+        cache_size = int(self._organizer.pluginSetting(self.name(), "string_cache_size") or 0)
+        if cache_size <= 0:
+            return None
+        use_hash = bool(self._organizer.pluginSetting(self.name(), "string_cache_use_hash"))
+        return StringCache(Path(self._string_cache_dir), cache_size * 1024 * 1024, use_hash)
+
+    def _set_index_scheme(self):
+        # 任务索引默认使用BLAKE2b，在不同进程和运行之间保持一致
+        if self._organizer.pluginSetting(self.name(), "legacy_string_indices"):
+            Record.index_scheme = IndexScheme.Hash
+        else:
+            Record.index_scheme = IndexScheme.Blake2
 
     def _get_output_mod_name(self, is_auto_run: bool = False) -> str:
         logger.debug(f"[DSDGenerator] Getting output mod name, auto_run: {is_auto_run}")
@@ -298,13 +248,31 @@ class DSDGenerator(mobase.IPluginTool):
             saved_name = self._organizer.pluginSetting(self.name(), "output_mod_name")
             if saved_name:
                 return str(saved_name)
-            # 如果没有保存的名称，使用默认格式
+            # 如果没有保存的名称，复用最新的带有清单的输出模组，以便只重新生成有变化的配置
+            last_name = self._find_last_output_mod_name()
+            if last_name:
+                return last_name
+            # 否则使用默认格式
             return f"DSD_Configs_{datetime.now().strftime('%y-%m-%d-%H-%M')}"
         else:
             # 正常运行时从对话框获取
             custom_name = self._dialog.get_output_name()
             return custom_name if custom_name else self._dialog.output_edit.placeholderText()
 
+    def _find_last_output_mod_name(self) -> str | None:
+        mods_path = self._organizer.modsPath()
+        try:
+            names = os.listdir(mods_path)
+        except OSError:
+            return None
+        # 时间戳格式的名称按字母顺序排序即为时间顺序
+        for name in sorted(names, reverse=True):
+            if name.startswith("DSD_Configs_") and os.path.isfile(
+                os.path.join(mods_path, name, OutputManifest.FILE_NAME)
+            ):
+                return name
+        return None
+
     def _should_copy_to_patch_dir(self, is_auto_run: bool = False) -> bool:
         logger.debug(f"[DSDGenerator] Checking if should copy to patch dir, auto_run: {is_auto_run}")
         if is_auto_run:
@@ -313,11 +281,33 @@ class DSDGenerator(mobase.IPluginTool):
 
     def generate_dsd_configs(self, show_progress: bool = True, is_auto_run: bool = False, blacklist: list[str] = []):
         logger.debug(f"[DSDGenerator] Starting DSD config generation. show_progress: {show_progress}, auto_run: {is_auto_run}")
+
+        # 在GUI线程中获取加载顺序快照，工作线程中不调用mobase
+        load_order = self._get_load_order()
+
+        # 设置输出目录
+        output_mod_name = self._get_output_mod_name(is_auto_run)
+        output_mod_path = os.path.join(self._organizer.modsPath(), output_mod_name)
+        copy_to_patch_dir = self._should_copy_to_patch_dir(is_auto_run)
+        max_workers = int(self._organizer.pluginSetting(self.name(), "max_workers") or 0)
+        string_cache = self._get_string_cache()
+        compact_json = bool(self._organizer.pluginSetting(self.name(), "compact_json"))
+        self._set_index_scheme()
+        # 仅在启用时记录各阶段耗时
+        report = RunReport() if self._organizer.pluginSetting(self.name(), "write_run_report") else None
+
+        worker = DSDGenerationWorker(self, load_order, blacklist, output_mod_path, copy_to_patch_dir, max_workers, string_cache,
+                                     compact_json, report)
+        thread = QThread()
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.finished.connect(thread.quit)
+
         progress_dialog = None
         if show_progress:
             progress_dialog = QProgressDialog(
                 tr("Preparing to scan mods..."), 
-                None,
+                tr("Cancel"),
                 0,
                 0,
                 self._parent
@@ -325,180 +315,37 @@ class DSDGenerator(mobase.IPluginTool):
             progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
             progress_dialog.setMinimumDuration(0)
             progress_dialog.setValue(0)
-            progress_dialog.setAutoClose(True)
-            progress_dialog.setAutoReset(True)
+            progress_dialog.setAutoClose(False)
+            progress_dialog.setAutoReset(False)
             progress_dialog.setLabelText(tr("[ESP2DSD] Scanning translation patches..."))
-            # 强制刷新界面，确保进度条立即显示
-            QCoreApplication.processEvents()
+            # 直接在GUI线程中调用，工作线程的事件循环在转换期间被阻塞
+            progress_dialog.canceled.connect(worker.cancel, Qt.ConnectionType.DirectConnection)
+            worker.label_changed.connect(progress_dialog.setLabelText)
+            worker.maximum_changed.connect(progress_dialog.setMaximum)
+            worker.progress_changed.connect(progress_dialog.setValue)
+
+        # 在工作线程中扫描和转换，同时保持界面响应
+        loop = QEventLoop()
+        # finished由工作线程发出，排队到GUI线程，因此不会在loop.exec()之前丢失
+        thread.finished.connect(loop.quit)
+        thread.start()
+        loop.exec()
+        thread.wait()
 
-        # 将黑名单分为文件黑名单、文件夹黑名单和modid黑名单
-        blacklist_files = []
-        blacklist_folders = []
-        blacklist_modids = []
-        
-        # 读取黑名单
-        blacklist_items = blacklist
-        for item in blacklist_items:
-            item = item.strip()
-            if not item or item.startswith('#'):
-                continue
-            if item.startswith('@'):
-                blacklist_modids.append(item[1:].lower())
-            elif item.endswith('/'):
-                blacklist_folders.append(item[:-1].lower())
-            else:
-                blacklist_files.append(item.lower())
-
-        # 获取所有已启用的模组
-        mods = [mod for mod in self._organizer.modList().allModsByProfilePriority() if self._organizer.modList().state(mod) & mobase.ModState.ACTIVE]
-        original_files = {}
-        translation_files = {}
-
-        # 遍历所有模组，按加载顺序从低到高
-        logger.debug(f"Processing mods...")
-        for mod_name in mods:
-
-            logger.debug(f"Processing mod: {mod_name}")
-            # 检查模组是否在黑名单中
-            if mod_name.lower() in blacklist_folders:
-                logger.debug(f"Skipping mod {mod_name} due to folder blacklist")
-                continue
-                
-            mod = self._organizer.modList().getMod(mod_name)
-            if not mod:
-                logger.debug(f"Mod {mod_name} not found in mod list, skipping...")
-                continue
+        if progress_dialog:
+            progress_dialog.close()
 
-            # 检查modid是否在黑名单中 (仅当blacklist_modids非空)
-            logger.debug(f"Checking modid for {mod_name}...")
-            if blacklist_modids:
-                mod_meta_file = os.path.join(mod.absolutePath(), 'meta.ini')
-                skip_mod = False
-                if os.path.exists(mod_meta_file):
-                    with open(mod_meta_file, 'r', encoding='utf-8') as f:
-                        for line in f:
-                            if line.startswith('modid='):
-                                mod_id = line.strip().split('=')[1].lower()
-                                if mod_id in blacklist_modids:
-                                    skip_mod = True
-                                    blacklist_modids.remove(mod_id)
-                                break
-                if skip_mod:
-                    continue
-                    
-            # 遍历模组中的文件
-            logger.debug(f"Processing mod: {mod_name}")
-            mod_path = mod.absolutePath()
-            # 只遍历mod_path下的第一层文件，不进行深度遍历
-            try:
-                files = os.listdir(mod_path)
-            except Exception as e:
-                logger.warning(f"Failed to list files in {mod_path}: {e}")
-                continue
-            root = mod_path
-            for file in files:
-                # 跳过黑名单中的插件
-                if file.lower() in map(str.lower, blacklist_files):
-                    continue
-                    
-                if file.lower().endswith(('.esp', '.esm', '.esl')):
-                    full_path = os.path.join(root, file)
-                    relative_path = os.path.relpath(full_path, mod_path)
-                    
-                    # 检查这个文件是否覆盖了之前的文件
-                    if relative_path in original_files:
-                        # 检查配对有效性
-                        if not self._is_valid_translation_pair(original_files[relative_path], full_path):
-                            logger.info(f"Skipping invalid translation pair: {original_files[relative_path]} -> {full_path}")
-                            continue
-                        # 这是一个翻译文件，记录它和对应的原始文件
-                        translation_files[relative_path] = {
-                            'path': full_path,
-                            'original': original_files[relative_path],
-                            'mod_name': mod_name  # 保存mod名称而不是priority
-                        }
-                    else:
-                        # 这是一个原始文件
-                        original_files[relative_path] = full_path
-        
-        if not translation_files:
-            if progress_dialog:
-                progress_dialog.close()
+        if worker.error is not None:
+            raise worker.error
+
+        if worker.translation_count == 0:
             QMessageBox.information(self._parent,"ESP2DSD", tr("No translation patches found in enabled mods!"))
             return
 
-        # 在获取到translation_files后更新进度对话框的最大值
-        if progress_dialog and len(translation_files) > 0:
-            progress_dialog.setMaximum(len(translation_files))
-            progress_dialog.setLabelText(tr("Generating DSD configurations..."))
-            translating_progress = 0
-
-        # 设置输出目录
-        output_mod_name = self._get_output_mod_name(is_auto_run)
-
-        # 统计最终生成的翻译文件数量
-        output_files_count = 0
-
-        # 为每个翻译文件生成DSD配置
-        logger.debug(f"Generated DSD configurations in {output_mod_name}...")
-        for file_path, info in translation_files.items():
-            # 如果存在多个翻译，选择优先级最高的
-            if (file_path in translation_files and 
-                self._get_mod_priority(translation_files[file_path]['mod_name']) > 
-                self._get_mod_priority(info['mod_name'])):
-                continue
-            
-            # 调用esp2dsd生成配置文件
-            output_dir = os.path.join(self._organizer.modsPath(), output_mod_name, r"SKSE/Plugins/DynamicStringDistributor", os.path.basename(file_path))
-            output_file = os.path.join(output_dir, os.path.basename(file_path) + ".json")
-            try:
-                # Call the python function to get the DSD config as a string
-                json_string = esp2dsd(Path(info['path']), Path(info['original']))
-                
-                # Check if the generated config is empty (just "[]")
-                if len(json_string) < 3:
-                    self._record_incorrect_pair(info['original'], info['path'])
-                    logger.warning(f"Empty config generated for {file_path}, recorded as incorrect pair")
-                else:
-                    os.makedirs(output_dir, exist_ok=True)
-                    with open(output_file, 'w', encoding='utf-8') as f:
-                        f.write(json_string)
-                    
-                    if self._should_copy_to_patch_dir(is_auto_run):
-                        # 检查原文件是否存在且能访问
-                        if os.path.exists(info['path']) and os.access(info['path'], os.W_OK):
-                            # 检查目标文件是否已存在
-                            if not os.path.exists(info['path'] + ".mohidden"):
-                                os.rename(info['path'], info['path'] + ".mohidden")
-                                
-                                translation_patch_dir = os.path.dirname(info['path'])
-                                copy_to_dir = os.path.join(translation_patch_dir, 
-                                                            "SKSE", "Plugins", 
-                                                            "DynamicStringDistributor",
-                                                            os.path.basename(file_path))
-                                os.makedirs(copy_to_dir, exist_ok=True)
-                                shutil.copy2(output_file, os.path.join(copy_to_dir, os.path.basename(output_file)))
-                            else:
-                                logger.warning(
-                                    f"Skipped renaming {info['path']}: .mohidden file already exists")
-                        else:
-                            logger.critical(
-                                f"Cannot access file for renaming: {info['path']}")
-                    output_files_count += 1
-
-            except Exception as e:
-                raise Exception(f"Error processing {file_path}: {str(e)}")
-
-            if progress_dialog:
-                translating_progress += 1
-                progress_dialog.setValue(translating_progress)
-
-        # 修改进度对话框的关闭逻辑
-        if progress_dialog:
-            progress_dialog.setValue(progress_dialog.maximum())
-            progress_dialog.close()
-
-        if is_auto_run:
+        output_files_count = worker.output_files_count
+        if worker.canceled:
+            logger.info(f"DSD config generation canceled. {output_files_count} files generated.")
+        elif is_auto_run:
             logger.info(
                 f"DSD configurations generated successfully! {output_files_count} files generated."
             )
@@ -515,7 +362,126 @@ class DSDGenerator(mobase.IPluginTool):
         # 自动运行时自动启用生成的模组
         if (is_auto_run and output_files_count > 0):
             self._organizer.modList().setActive(output_mod_name, True)
-        
-    def _get_mod_priority(self, mod_name: str) -> int:
-        logger.debug(f"[DSDGenerator] Getting priority for mod: {mod_name}")
-        return self._organizer.modList().priority(mod_name) # type: ignore
\ No newline at end of file
+
+    def _get_load_order(self) -> LoadOrder:
+        """一次遍历获取所有模组的名称、优先级、启用状态和路径"""
+        mod_list = self._organizer.modList()
+        mods = []
+        for priority, mod_name in enumerate(mod_list.allModsByProfilePriority()):
+            mod = mod_list.getMod(mod_name)
+            if not mod:
+                logger.debug(f"Mod {mod_name} not found in mod list, skipping...")
+                continue
+            active = bool(mod_list.state(mod_name) & mobase.ModState.ACTIVE)
+            mods.append(ModInfo(mod_name, priority, active, mod.absolutePath()))
+        return LoadOrder(mods)
+
+    def _find_translation_files(self, load_order: LoadOrder, blacklist: list[str],
+                                report: RunReport | None = None) -> dict[str, TranslationFile]:
+        """在工作线程中运行，不能调用mobase"""
+        # 将黑名单编译为文件、文件夹和modid集合以及通配符/正则表达式
+        compiled_blacklist = Blacklist(blacklist)
+
+        # 扫描索引记录每个mod目录中的插件，目录未修改的mod无需重新列出文件
+        scan_index = ModScanIndex(Path(self._scan_index_file))
+        scan_index.load()
+        try:
+            # 与命令行版本使用相同的发现、验证和黑名单规则
+            return find_translation_files(load_order, scan_index, compiled_blacklist, self._incorrect_pairs, report)
+        finally:
+            try:
+                scan_index.save()
+            except OSError as e:
+                logger.warning(f"Failed to save scan index: {e}")
+
+    def _convert_translation_files(self, translation_files: dict[str, TranslationFile], output_mod_path: str,
+                                   copy_to_patch_dir: bool, converter: BatchConverter,
+                                   on_converted: Callable[[ConversionJob, bool | Exception | None], None],
+                                   compact_json: bool = False, report: RunReport | None = None) -> int:
+        """在工作线程中运行，不能调用mobase，返回生成的文件数量"""
+        logger.debug(f"Generating DSD configurations in {output_mod_path}...")
+        result = convert_translation_files(translation_files, output_mod_path, converter, on_converted,
+                                           self._incorrect_pairs, copy_to_patch_dir, compact_json, report)
+
+        # 报告第一个转换失败的插件
+        for file_path, error in result.errors.items():
+            raise Exception(f"Error processing {file_path}: {str(error)}")
+
+        return result.output_files_count
+
+
+class DSDGenerationWorker(QObject):
+    """在工作线程中扫描翻译补丁并生成DSD配置，通过信号报告进度"""
+
+    label_changed = pyqtSignal(str)
+    maximum_changed = pyqtSignal(int)
+    progress_changed = pyqtSignal(int)
+    finished = pyqtSignal()
+
+    def __init__(self, generator: DSDGenerator, load_order: LoadOrder, blacklist: list[str],
+                 output_mod_path: str, copy_to_patch_dir: bool, max_workers: int,
+                 string_cache: StringCache | None = None, compact_json: bool = False,
+                 report: RunReport | None = None):
+        super().__init__()
+        self._generator = generator
+        self._load_order = load_order
+        self._blacklist = blacklist
+        self._output_mod_path = output_mod_path
+        self._copy_to_patch_dir = copy_to_patch_dir
+        self._compact_json = compact_json
+        self._report = report
+        self._converter = BatchConverter(max_workers, self._on_plugin_progress, string_cache, report)
+        self._converted_count = 0
+        self.translation_count = 0
+        self.output_files_count = 0
+        self.canceled = False
+        self.error: Exception | None = None
+
+    def cancel(self):
+        # 由GUI线程调用，正在转换的插件完成后停止
+        logger.info("[DSDGenerator] Cancel requested")
+        self.canceled = True
+        self._converter.cancel()
+
+    def run(self):
+        try:
+            with measure(self._report, "scan"):
+                translation_files = self._generator._find_translation_files(
+                    self._load_order, self._blacklist, self._report
+                )
+            self.translation_count = len(translation_files)
+            if not translation_files or self.canceled:
+                return
+
+            # 在获取到translation_files后更新进度对话框的最大值
+            self.maximum_changed.emit(len(translation_files))
+            self.label_changed.emit(tr("Generating DSD configurations..."))
+            self.output_files_count = self._generator._convert_translation_files(
+                translation_files, self._output_mod_path, self._copy_to_patch_dir,
+                self._converter, self._on_pair_converted, self._compact_json, self._report
+            )
+        except Exception as e:
+            self.error = e
+        finally:
+            self._save_report()
+            self.finished.emit()
+
+    def _save_report(self):
+        # 只在输出模组已存在时写入运行报告
+        if self._report is None or not os.path.isdir(self._output_mod_path):
+            return
+        try:
+            self._report.save(Path(self._output_mod_path))
+        except OSError as e:
+            logger.warning(f"Failed to save run report: {e}")
+
+    def _on_pair_converted(self, job: ConversionJob, result: bool | Exception | None):
+        self._converted_count += 1
+        self.progress_changed.emit(self._converted_count)
+
+    def _on_plugin_progress(self, job: ConversionJob, plugin_name: str, current: int, total: int):
+        # 报告大型插件内部的进度（已扫描的组数/总组数）
+        self.label_changed.emit(
+            tr("Generating DSD configurations...") +
+            f"\n{plugin_name}: {current}/{total} ({self._converted_count}/{self.translation_count})"
+        )